@@ -11,6 +11,7 @@ function GraphChatInterface({ kgData }) {
   const [error, setError] = useState(null);
   const messagesEndRef = useRef(null);
   const chatContainerRef = useRef(null);
+  const streamControllerRef = useRef(null);
 
   // Scroll to bottom when new messages arrive
   const scrollToBottom = () => {
@@ -23,18 +24,32 @@ function GraphChatInterface({ kgData }) {
 
   // Subscribe to query events
   useEffect(() => {
+    const handleQueryToken = (event) => {
+      const { query, token } = event.data;
+      setMessages(prev => {
+        const last = prev[prev.length - 1];
+        if (last && last.streaming) {
+          return [...prev.slice(0, -1), { ...last, content: last.content + token }];
+        }
+        return [...prev, { type: 'assistant', content: token, query, streaming: true }];
+      });
+    };
+
     const handleQuerySuccess = (event) => {
       setIsLoading(false);
       setError(null);
+      streamControllerRef.current = null;
       const { query, answer } = event.data;
-      setMessages(prev => [
-        ...prev,
-        { type: 'assistant', content: answer, query }
-      ]);
+      setMessages(prev => {
+        const last = prev[prev.length - 1];
+        const rest = last && last.streaming ? prev.slice(0, -1) : prev;
+        return [...rest, { type: 'assistant', content: answer, query }];
+      });
     };
 
     const handleQueryError = async (event) => {
       setIsLoading(false);
+      streamControllerRef.current = null;
       let errorMsg = 'An error occurred while querying the knowledge graph.';
       
       // Try to extract error message from errorPromise if it exists
@@ -58,7 +73,9 @@ function GraphChatInterface({ kgData }) {
 
     // Subscribe to events
     const subscriptionId = messageBus.subscribe('app__kg', (event) => {
-      if (event.event_name === 'KG_QUERY_SUCCESS') {
+      if (event.event_name === 'KG_QUERY_TOKEN') {
+        handleQueryToken(event);
+      } else if (event.event_name === 'KG_QUERY_SUCCESS') {
         handleQuerySuccess(event);
       } else if (event.event_name === 'KG_QUERY_ERROR') {
         handleQueryError(event);
@@ -67,6 +84,8 @@ function GraphChatInterface({ kgData }) {
 
     return () => {
       messageBus.unsubscribe('app__kg', subscriptionId);
+      // Stop paying for an answer nobody will see.
+      streamControllerRef.current?.abort();
     };
   }, []);
 
@@ -88,11 +107,14 @@ function GraphChatInterface({ kgData }) {
     // Add user message
     setMessages(prev => [...prev, { type: 'user', content: userMessage }]);
 
-    // Query the knowledge graph
-    kgService.queryKG(userMessage);
+    // Query the knowledge graph, streaming the answer as it is generated
+    streamControllerRef.current = kgService.queryKGStream(userMessage);
   };
 
   const handleClearChat = () => {
+    streamControllerRef.current?.abort();
+    streamControllerRef.current = null;
+    setIsLoading(false);
     setMessages([]);
     setError(null);
     kgService.clearConversation();
@@ -142,7 +164,7 @@ function GraphChatInterface({ kgData }) {
             </div>
           </div>
         ))}
-        {isLoading && (
+        {isLoading && !messages[messages.length - 1]?.streaming && (
           <div className="chat-message assistant loading">
             <div className="message-content">
               <Spinner animation="border" size="sm" className="me-2" />
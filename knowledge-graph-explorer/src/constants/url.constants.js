@@ -4,5 +4,6 @@ export const URLS = {
   KG_GENERATE: `/api/generate-knowledge-graph`,
   KG_METADATA_ALLOWED_TYPES: `/api/allowed-types`,
   KG_QUERY: `/api/query-knowledge-graph`,
+  KG_QUERY_STREAM: `/api/query-knowledge-graph/stream`,
   CONVERSATION_CLEAR: `/api/clear-conversation`,
 };
\ No newline at end of file
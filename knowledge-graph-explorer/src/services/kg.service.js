@@ -80,6 +80,91 @@ class KGService {
     apiService.postRequest(url, headers, JSON.stringify(body), successHandler, errorHandler);
   }
 
+  /**
+   * Query the KG and stream the answer over SSE. Publishes KG_QUERY_TOKEN for
+   * each token, then KG_QUERY_SUCCESS with the full answer (or KG_QUERY_ERROR).
+   * Returns an AbortController; aborting cancels the generation server-side.
+   */
+  queryKGStream(query) {
+    const url = `${API_BASE_PATH}${URLS.KG_QUERY_STREAM}`;
+    const controller = new AbortController();
+
+    const publishError = (error) => {
+      console.error('KG query stream failed:', error);
+      messageBus.publish('app__kg', {
+        event_name: 'KG_QUERY_ERROR',
+        data: error,
+      });
+    };
+
+    const handleEvent = (rawEvent) => {
+      let eventName = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim();
+        }
+      });
+      if (!data) {
+        return;
+      }
+      const payload = JSON.parse(data);
+      if (eventName === 'done') {
+        messageBus.publish('app__kg', {
+          event_name: 'KG_QUERY_SUCCESS',
+          data: payload,
+        });
+      } else if (eventName === 'error') {
+        publishError({ errorPromise: Promise.resolve(payload) });
+      } else {
+        messageBus.publish('app__kg', {
+          event_name: 'KG_QUERY_TOKEN',
+          data: { query, token: payload.token },
+        });
+      }
+    };
+
+    fetch(url, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+      },
+      body: JSON.stringify({ query }),
+      signal: controller.signal,
+    })
+      .then(async (response) => {
+        if (!response.ok) {
+          throw { status: response.status, errorPromise: response.json() };
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) {
+            break;
+          }
+          buffer += decoder.decode(value, { stream: true });
+          let boundary = buffer.indexOf('\n\n');
+          while (boundary !== -1) {
+            handleEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf('\n\n');
+          }
+        }
+      })
+      .catch((error) => {
+        if (error?.name !== 'AbortError') {
+          publishError(error);
+        }
+      });
+
+    return controller;
+  }
+
   clearConversation() {
     const url = `${API_BASE_PATH}${URLS.CONVERSATION_CLEAR}`;
     const headers = {
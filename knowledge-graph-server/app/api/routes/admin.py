@@ -0,0 +1,56 @@
+# app/api/routes/admin.py
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.config import settings
+from app.core.profiling import list_profiles, load_profile, to_speedscope
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Check the X-Admin-Token header. Without a configured admin token the
+    admin endpoints are disabled, since they expose stack traces and file
+    paths of production requests.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not secrets.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/admin/profiles")
+def get_profiles():
+    """
+    List stored request profiles, newest first.
+    """
+    return {
+        "enabled": settings.profiling_enabled,
+        "sample_rate": settings.profiling_sample_rate,
+        "max_profiles": settings.profiling_max_profiles,
+        "profiles": list_profiles()
+    }
+
+@router.get("/admin/profiles/{profile_id}")
+def download_profile(profile_id: str, format: str = "speedscope"):
+    """
+    Download a stored profile as speedscope JSON (open at https://www.speedscope.app)
+    or as collapsed stacks (for flamegraph.pl / inferno).
+    """
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            profile["collapsed"],
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed"'}
+        )
+    if format == "speedscope":
+        return JSONResponse(
+            to_speedscope(profile["metadata"], profile["collapsed"]),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+        )
+    raise HTTPException(status_code=400, detail="format must be 'speedscope' or 'collapsed'")
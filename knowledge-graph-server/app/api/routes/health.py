@@ -0,0 +1,23 @@
+# app/api/routes/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.startup import get_startup_report
+
+router = APIRouter()
+
+@router.get("/health/live")
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: warm-up has finished and the worker can take traffic.
+    Returns 503 until then.
+    """
+    report = get_startup_report()
+    status_code = 200 if report["ready"] else 503
+    return JSONResponse(status_code=status_code, content=report)
@@ -1,40 +1,271 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.requests import KGGenerateRequest, KGQueryRequest
-from app.services.kg_extractor import extract_knowledge_graph
-from app.storage.cache import save_last_kg, save_conversation_history
-from app.services.kg_visual_builder import build_visual_graph
-from app.services.kg_extractor import extract_factual_triplets
-from app.services.kg_query import query_knowledge_graph
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.singleflight import get_flight
+from app.schemas.requests import KGGenerateRequest, KGBatchGenerateRequest, KGQueryRequest
+from app.core.profiling import profiled
+from app.services.kg_revision import build_knowledge_graph, knowledge_graph_from_source
+from app.services.near_duplicates import check_near_duplicate, register_document, record_action
+from app.storage.cache import (
+    save_last_kg, load_last_kg, save_conversation_history, get_conversation_history, get_kg_version,
+    save_document_source, load_document_source
+)
+from app.services.kg_query import query_knowledge_graph, stream_query_knowledge_graph
 
 router = APIRouter()
 
+# Identical requests that arrive while one is in flight share its result.
+_generate_flight = get_flight("generate-knowledge-graph")
+_update_flight = get_flight("update-knowledge-graph")
+_query_flight = get_flight("query-knowledge-graph")
+# Batch documents do not replace the last KG, so they coalesce separately.
+_batch_flight = get_flight("generate-knowledge-graph-batch")
+
+# Shared by all batch requests of this worker: bounds how many batch documents
+# are processed at once, without taking threads from the request threadpool.
+_batch_executor = ThreadPoolExecutor(max_workers=max(1, settings.batch_max_concurrency), thread_name_prefix="kg-batch")
+
+
+def _publish(result, doc_id=None, publish=True):
+    source = result.pop("source")
+    if publish:
+        save_last_kg(result["kg"], result["visual_graph_nodes"], result["factual_triples"], source)
+    if doc_id is not None:
+        save_document_source(doc_id, source)
+    if publish:
+        save_conversation_history([])
+    return result
+
+
+def _generate(text: str, keep_ratio=None, previous_source=None, doc_id=None, publish=True):
+    return _publish(build_knowledge_graph(text, keep_ratio, previous_source), doc_id, publish)
+
+
+def _ingest(text: str, keep_ratio=None, publish=True):
+    """
+    Generate the KG of a submitted document, first checking it against the
+    documents ingested before. A near-duplicate is flagged and linked, and
+    depending on `near_duplicate_mode` either processed as usual ("flag"),
+    answered with the linked document's graph ("skip"), or re-extracted only
+    where its paragraphs differ from the linked document ("delta"). In skip
+    and delta mode, a resubmission of the exact same text is rebuilt from its
+    own saved source ("exact").
+
+    With `publish` false (batch documents) the result does not replace the
+    last KG used by queries; the document is still recorded for near-duplicate
+    detection.
+    """
+    if not settings.near_duplicate_enabled:
+        return _generate(text, keep_ratio, publish=publish)
+
+    check = check_near_duplicate(text)
+    duplicate_of = check["duplicate_of"]
+    action = "none"
+    linked_source = None
+    if duplicate_of is not None:
+        action = "flagged"
+        if settings.near_duplicate_mode in ("skip", "delta"):
+            linked_source = load_document_source(duplicate_of["doc_id"])
+            if linked_source is not None:
+                if duplicate_of["exact"]:
+                    action = "exact"
+                else:
+                    action = "skipped" if settings.near_duplicate_mode == "skip" else "delta"
+                    record_action(action)
+
+    if action in ("skipped", "exact"):
+        result = _publish(knowledge_graph_from_source(linked_source), publish=publish)
+    else:
+        result = _generate(text, keep_ratio, linked_source, doc_id=check["doc_id"], publish=publish)
+        register_document(check)
+
+    result["near_duplicate"] = {
+        "doc_id": check["doc_id"],
+        "duplicate_of": duplicate_of,
+        "action": action
+    }
+    return result
+
 @router.post("/generate-knowledge-graph")
+@profiled
 def generate_kg(req: KGGenerateRequest):
-    extracted_kg = extract_knowledge_graph(req.text)
-    visual_graph_nodes = build_visual_graph(extracted_kg)
-    factual_triples = extract_factual_triplets(extracted_kg)
-    save_last_kg(extracted_kg, visual_graph_nodes, factual_triples)
-    save_conversation_history([])
-    return {
-        "kg": extracted_kg,
-        "visual_graph_nodes": visual_graph_nodes,
-        "factual_triples": factual_triples
-    }
+    content_hash = hashlib.sha256(req.text.encode("utf-8")).hexdigest()
+    result, _ = _generate_flight.do((content_hash, req.keep_ratio), lambda: _ingest(req.text, req.keep_ratio))
+    return result
+
+@profiled
+def _generate_batch_document(text: str, keep_ratio=None):
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    result, _ = _batch_flight.do((content_hash, keep_ratio), lambda: _ingest(text, keep_ratio, publish=False))
+    return result
+
+@router.post("/generate-knowledge-graph/batch")
+async def generate_kg_batch(req: KGBatchGenerateRequest):
+    """
+    Generate the knowledge graphs of many documents, streamed back as NDJSON.
+
+    Documents are processed concurrently (at most `concurrency` of this batch,
+    and `batch_max_concurrency` across all batches). Each document yields one
+    line as soon as it is done, in completion order or, with order="input",
+    in request order: {"index", "id", "status": "ok", "kg",
+    "visual_graph_nodes", "factual_triples", ...} or {"index", "id",
+    "status": "error", "detail"}. A failed document does not affect the
+    others. The last line is {"summary": {...}}. If the client disconnects,
+    documents not yet started are dropped.
+
+    Batch results do not replace the last KG used by queries.
+    """
+    if not req.documents:
+        raise HTTPException(status_code=400, detail="No documents")
+    if len(req.documents) > settings.batch_max_documents:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_max_documents} documents per batch"
+        )
+
+    concurrency = settings.batch_max_concurrency
+    if req.concurrency is not None:
+        concurrency = min(max(req.concurrency, 1), concurrency)
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+
+    async def run(index, document):
+        line = {"index": index, "id": document.id if document.id is not None else str(index)}
+        async with slots:
+            item_started = time.perf_counter()
+            try:
+                # Run in a copy of the request context (e.g. the active profile).
+                result = await loop.run_in_executor(
+                    _batch_executor,
+                    contextvars.copy_context().run,
+                    _generate_batch_document, document.text, document.keep_ratio
+                )
+                line.update(status="ok", **result)
+            except Exception as e:
+                line.update(status="error", detail=str(e))
+            line["elapsed_ms"] = (time.perf_counter() - item_started) * 1000
+        return line
+
+    async def ndjson_stream():
+        tasks = [asyncio.ensure_future(run(i, d)) for i, d in enumerate(req.documents)]
+        succeeded = 0
+        try:
+            pending = asyncio.as_completed(tasks) if req.order == "completion" else tasks
+            for task in pending:
+                line = await task
+                succeeded += line["status"] == "ok"
+                yield json.dumps(line) + "\n"
+            yield json.dumps({"summary": {
+                "documents": len(tasks),
+                "succeeded": succeeded,
+                "failed": len(tasks) - succeeded,
+                "order": req.order,
+                "concurrency": concurrency,
+                "elapsed_ms": (time.perf_counter() - started) * 1000
+            }}) + "\n"
+        finally:
+            # Client gone: documents still waiting for a slot are not started.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/update-knowledge-graph")
+@profiled
+def update_kg(req: KGGenerateRequest):
+    """
+    Rebuild the knowledge graph for a revised version of the last document.
+
+    The text is diffed against the saved source paragraph by paragraph: only
+    changed blocks are re-extracted and re-triplified, facts and measurements
+    extracted from removed or changed paragraphs are retracted, and the rest
+    is reused. Falls back to a full generation when no source is saved.
+    """
+    def update():
+        cached = load_last_kg() or {}
+        return _generate(req.text, req.keep_ratio, cached.get("source"))
+
+    content_hash = hashlib.sha256(req.text.encode("utf-8")).hexdigest()
+    result, _ = _update_flight.do((get_kg_version(), content_hash, req.keep_ratio), update)
+    return result
 
 @router.post("/query-knowledge-graph")
+@profiled
 def query_kg(req: KGQueryRequest):
     """
     Query the factual triples of the knowledge graph with a natural language question.
     Uses the last generated KG from cache.
     """
+    # The answer depends on the graph and on the conversation so far, so both
+    # are part of the coalescing key.
+    key = (get_kg_version(), len(get_conversation_history()), req.query)
+
     # Query the knowledge graph using LLM (can use factual_triples if available)
-    answer = query_knowledge_graph(req.query)
+    answer, _ = _query_flight.do(key, lambda: query_knowledge_graph(req.query))
     
     return {
         "answer": answer,
         "query": req.query
     }
 
+def _sse(data, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/query-knowledge-graph/stream")
+async def query_kg_stream(req: KGQueryRequest, request: Request):
+    """
+    Stream the answer to a natural language question as Server-Sent Events.
+    
+    Emits one `data: {"token": ...}` event per completion delta, then an
+    `event: done` with the full answer (same shape as /query-knowledge-graph),
+    or an `event: error`. If the client disconnects, the upstream completion
+    is cancelled and the conversation history is left unchanged.
+    """
+    tokens = stream_query_knowledge_graph(req.query)
+    end = object()
+
+    async def event_stream():
+        answer_parts = []
+        try:
+            while True:
+                # Pull the next delta off the (blocking) LLM stream in a worker thread.
+                token = await run_in_threadpool(next, tokens, end)
+                if token is end:
+                    break
+                if await request.is_disconnected():
+                    return
+                answer_parts.append(token)
+                yield _sse({"token": token})
+            yield _sse({"answer": "".join(answer_parts), "query": req.query}, event="done")
+        except Exception as e:
+            yield _sse({"detail": str(e)}, event="error")
+        finally:
+            try:
+                tokens.close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside next(); the
+                # generator is closed when that thread drops its reference.
+                pass
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/clear-conversation")
 def clear_conversation():
     """
@@ -44,4 +275,4 @@ def clear_conversation():
         save_conversation_history([])
         return {"message": "Conversation history cleared"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,42 @@
+# app/api/routes/metrics.py
+from fastapi import APIRouter
+from app.core.model_router import get_routing_config, get_routing_stats
+from app.core.singleflight import get_coalescing_stats
+from app.services.doc_reducer import get_reduction_stats
+from app.services.near_duplicates import get_near_duplicate_stats
+
+router = APIRouter()
+
+@router.get("/metrics/model-routing")
+def model_routing_metrics():
+    """
+    Effective model routing configuration and per-route latency/token stats.
+    """
+    return {
+        "config": get_routing_config(),
+        "routes": get_routing_stats()
+    }
+
+
+@router.get("/metrics/coalescing")
+def coalescing_metrics():
+    """
+    In-flight request coalescing stats, including upstream LLM calls saved.
+    """
+    return get_coalescing_stats()
+
+
+@router.get("/metrics/document-reduction")
+def document_reduction_metrics():
+    """
+    Cumulative pre-extraction document reduction stats (estimated tokens saved).
+    """
+    return get_reduction_stats()
+
+
+@router.get("/metrics/near-duplicates")
+def near_duplicate_metrics():
+    """
+    Near-duplicate detection settings, LSH index size and exact/flagged/skipped/delta counts.
+    """
+    return get_near_duplicate_stats()
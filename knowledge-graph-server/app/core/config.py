@@ -1,10 +1,76 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     openai_api_key: str
+    # Point at an OpenAI-compatible server (e.g. benchmarks/llm_stub.py)
+    openai_base_url: Optional[str] = None
     model_name: str = "gpt-4o-mini"
 
+    # Model routing (see app/core/model_router.py)
+    # Extraction uses model_name unless a size route below applies.
+    extraction_fast_model_name: Optional[str] = None
+    extraction_long_context_model_name: Optional[str] = None
+    extraction_small_doc_chars: int = 8000
+    extraction_large_doc_chars: int = 100000
+    # Try extraction_fast_model_name first, escalate if the KG fails ontology validation
+    extraction_cascade: bool = False
+    triplets_model_name: str = "gpt-4o"
+    query_model_name: str = "gpt-4o-mini"
+
+    # Pre-LLM document reduction (see app/services/doc_reducer.py)
+    doc_reduction_enabled: bool = True
+    # Fraction of sentence tokens kept, highest financial signal first; 1.0 only
+    # normalises and strips boilerplate. Sentences stating figures are always kept.
+    doc_reduction_keep_ratio: float = 1.0
+    # Shorter documents are only normalised, never have sentences dropped
+    doc_reduction_min_chars: int = 4000
+
+    # Block-wise extraction and revisions (see app/services/kg_revision.py)
+    # Paragraphs are extracted in blocks of up to this many characters: larger
+    # blocks cost fewer prompt tokens, smaller ones make revisions cheaper.
+    revision_block_chars: int = 12000
+    # Blocks of one document extracted concurrently
+    revision_block_concurrency: int = 4
+
+    # Near-duplicate detection at ingestion (see app/services/near_duplicates.py)
+    near_duplicate_enabled: bool = True
+    # Estimated Jaccard similarity of word shingles at which documents are near-duplicates
+    near_duplicate_threshold: float = 0.85
+    # "flag": link and process as usual; "skip": return the linked graph without
+    # LLM calls; "delta": re-extract only paragraphs that differ from the linked document
+    near_duplicate_mode: str = "flag"
+    near_duplicate_num_perm: int = 128
+    near_duplicate_shingle_words: int = 5
+    # Defaults to app/storage/minhash
+    near_duplicate_dir: Optional[str] = None
+
+    # Batch generation (POST /api/generate-knowledge-graph/batch)
+    batch_max_documents: int = 100
+    # Documents processed at once across all batch requests of a worker
+    batch_max_concurrency: int = 4
+
+    # Opt-in request profiling (see app/core/profiling.py)
+    # Master switch: when false, neither X-Profile nor sampling profiles anything
+    profiling_enabled: bool = False
+    # Fraction of requests profiled without the X-Profile header
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 5.0
+    # Oldest profiles beyond this count are deleted
+    profiling_max_profiles: int = 50
+    # Defaults to app/storage/profiles
+    profiling_dir: Optional[str] = None
+    # Required in the X-Admin-Token header of /api/admin/*; unset disables them
+    admin_token: Optional[str] = None
+
+    # Startup / warm-up
+    warmup_in_background: bool = True
+    warmup_llm_connection: bool = True
+    # Upper bound on the connection warm-up request, which readiness waits for (no retries)
+    warmup_llm_timeout_seconds: float = 5.0
+    startup_budget_seconds: float = 3.0
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
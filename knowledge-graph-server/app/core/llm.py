@@ -1,11 +1,15 @@
-from openai import OpenAI
 from app.core.config import settings
 
 client = None
 
 def init_llm():
     global client
-    client = OpenAI(api_key=settings.openai_api_key)
+    # Imported lazily: the openai package is the single heaviest import in the
+    # app and is not needed until the first LLM call.
+    from openai import OpenAI
+    client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
 
 def get_llm():
-    return client
\ No newline at end of file
+    if client is None:
+        init_llm()
+    return client
@@ -0,0 +1,316 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.llm import get_llm
+
+EXTRACTION = "extraction"
+TRIPLETS = "triplets"
+QUERY = "query"
+
+# Number of recent latencies kept per (stage, model) for percentiles.
+_LATENCY_WINDOW = 1000
+
+_STATS_LOCK = threading.Lock()
+_ROUTE_STATS: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+# Counter of LLM calls made in the current context, see `count_llm_calls`.
+# Worker threads started with a copy of the context count into the same one.
+_CALL_COUNTER: contextvars.ContextVar = contextvars.ContextVar("llm_call_counter", default=None)
+
+
+class CallCount:
+    """
+    Number of LLM calls made inside a `count_llm_calls` block.
+    """
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+@contextmanager
+def count_llm_calls() -> Iterator[CallCount]:
+    """
+    Count the LLM calls made by the enclosed code, including calls made in
+    worker threads that run in a copy of the current context.
+    """
+    count = CallCount()
+    token = _CALL_COUNTER.set(count)
+    try:
+        yield count
+    finally:
+        _CALL_COUNTER.reset(token)
+
+
+def uses_long_context_model(text_length: int) -> bool:
+    """
+    Whether a document of `text_length` characters is routed to the
+    long-context extraction model.
+    """
+    return bool(settings.extraction_long_context_model_name) and text_length >= settings.extraction_large_doc_chars
+
+
+def extraction_models(text_length: int) -> List[str]:
+    """
+    Pick the model(s) to try, in order, for extracting a KG from a document of
+    `text_length` characters.
+
+    Small documents go to the fast model and large ones to the long-context
+    model when those are configured; everything else uses `model_name`. In
+    cascade mode the fast model is always tried first, escalating to the
+    size-routed model (or `model_name` for small documents). Documents above
+    the long-context threshold never cascade, since the fast model may not
+    fit them.
+    """
+    fast = settings.extraction_fast_model_name
+    long_context = settings.extraction_long_context_model_name
+
+    if uses_long_context_model(text_length):
+        return [long_context]
+
+    if fast and text_length <= settings.extraction_small_doc_chars:
+        routed = fast
+    else:
+        routed = settings.model_name
+
+    if settings.extraction_cascade and fast:
+        escalation = settings.model_name if routed == fast else routed
+        if escalation != fast:
+            return [fast, escalation]
+    return [routed]
+
+
+def stage_model(stage: str) -> str:
+    """
+    Get the configured model for a single-model stage.
+    """
+    if stage == TRIPLETS:
+        return settings.triplets_model_name
+    if stage == QUERY:
+        return settings.query_model_name
+    return settings.model_name
+
+
+def _route_stats(stage: str, model: str) -> Dict[str, Any]:
+    stage_stats = _ROUTE_STATS.setdefault(stage, {})
+    stats = stage_stats.get(model)
+    if stats is None:
+        stats = stage_stats[model] = {
+            "calls": 0,
+            "errors": 0,
+            "escalations": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_latency_s": 0.0,
+            "latencies": deque(maxlen=_LATENCY_WINDOW),
+            "ttfts": deque(maxlen=_LATENCY_WINDOW),
+            "cancelled": 0,
+        }
+    return stats
+
+
+def record_call(
+    stage: str,
+    model: str,
+    latency: float,
+    usage=None,
+    error: bool = False,
+    ttft: Optional[float] = None,
+    cancelled: bool = False
+) -> None:
+    """
+    Record one LLM call for a (stage, model) route.
+    """
+    count = _CALL_COUNTER.get()
+    if count is not None:
+        count.increment()
+    with _STATS_LOCK:
+        stats = _route_stats(stage, model)
+        stats["calls"] += 1
+        stats["total_latency_s"] += latency
+        stats["latencies"].append(latency)
+        if ttft is not None:
+            stats["ttfts"].append(ttft)
+        if error:
+            stats["errors"] += 1
+        if cancelled:
+            stats["cancelled"] += 1
+        if usage is not None:
+            stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+
+def record_escalation(stage: str, model: str) -> None:
+    """
+    Record that output from `model` failed validation and the cascade moved on.
+    """
+    with _STATS_LOCK:
+        _route_stats(stage, model)["escalations"] += 1
+
+
+def chat_completion(stage: str, model: str, **kwargs):
+    """
+    Call the chat completions API for a pipeline stage, recording latency and
+    token usage for the route.
+
+    Args:
+        stage: Pipeline stage (EXTRACTION, TRIPLETS or QUERY)
+        model: Model name to call
+        **kwargs: Passed through to client.chat.completions.create
+
+    Returns:
+        The chat completion response
+    """
+    client = get_llm()
+    if client is None:
+        raise RuntimeError("LLM client not initialized. Call init_llm() first.")
+
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(model=model, **kwargs)
+    except Exception:
+        record_call(stage, model, time.perf_counter() - started, error=True)
+        raise
+    record_call(stage, model, time.perf_counter() - started, getattr(response, "usage", None))
+    return response
+
+
+def chat_completion_stream(stage: str, model: str, **kwargs) -> Iterator[str]:
+    """
+    Stream a chat completion for a pipeline stage, yielding content deltas as
+    they arrive. Records time-to-first-token, total latency and token usage.
+
+    Closing the generator early (e.g. when the client disconnects) closes the
+    upstream HTTP stream so the provider stops generating.
+
+    Args:
+        stage: Pipeline stage (EXTRACTION, TRIPLETS or QUERY)
+        model: Model name to call
+        **kwargs: Passed through to client.chat.completions.create
+
+    Yields:
+        Content deltas of the completion
+    """
+    client = get_llm()
+    if client is None:
+        raise RuntimeError("LLM client not initialized. Call init_llm() first.")
+
+    started = time.perf_counter()
+    ttft = None
+    usage = None
+    finished = False
+    error = False
+    stream = None
+    try:
+        stream = client.chat.completions.create(
+            model=model, stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield delta
+        finished = True
+    except Exception:
+        error = True
+        raise
+    finally:
+        if stream is not None and not finished:
+            stream.close()
+        record_call(
+            stage, model, time.perf_counter() - started, usage,
+            error=error, ttft=ttft, cancelled=not finished and not error
+        )
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    """
+    Get per-route latency and token statistics.
+
+    Returns:
+        Dictionary of {stage: {model: stats}}, with latencies in milliseconds
+        computed over the most recent calls
+    """
+    with _STATS_LOCK:
+        snapshot = {
+            stage: {
+                model: dict(stats, latencies=list(stats["latencies"]), ttfts=list(stats["ttfts"]))
+                for model, stats in models.items()
+            }
+            for stage, models in _ROUTE_STATS.items()
+        }
+
+    report: Dict[str, Any] = {}
+    for stage, models in snapshot.items():
+        report[stage] = {}
+        for model, stats in models.items():
+            latencies = sorted(stats["latencies"])
+            ttfts = sorted(stats["ttfts"])
+            calls = stats["calls"]
+            report[stage][model] = {
+                "calls": calls,
+                "errors": stats["errors"],
+                "cancelled": stats["cancelled"],
+                "escalations": stats["escalations"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+                "avg_prompt_tokens": stats["prompt_tokens"] / calls if calls else 0.0,
+                "avg_completion_tokens": stats["completion_tokens"] / calls if calls else 0.0,
+                "latency_ms": {
+                    "avg": stats["total_latency_s"] / calls * 1000 if calls else 0.0,
+                    "p50": _percentile(latencies, 50) * 1000,
+                    "p95": _percentile(latencies, 95) * 1000,
+                    "max": (latencies[-1] if latencies else 0.0) * 1000,
+                },
+            }
+            if ttfts:
+                report[stage][model]["ttft_ms"] = {
+                    "p50": _percentile(ttfts, 50) * 1000,
+                    "p95": _percentile(ttfts, 95) * 1000,
+                }
+    return report
+
+
+def get_routing_config() -> Dict[str, Any]:
+    """
+    Get the effective routing configuration.
+    """
+    return {
+        EXTRACTION: {
+            "default": settings.model_name,
+            "fast": settings.extraction_fast_model_name,
+            "long_context": settings.extraction_long_context_model_name,
+            "small_doc_chars": settings.extraction_small_doc_chars,
+            "large_doc_chars": settings.extraction_large_doc_chars,
+            "cascade": settings.extraction_cascade,
+        },
+        TRIPLETS: settings.triplets_model_name,
+        QUERY: settings.query_model_name,
+    }
+
+
+def reset_routing_stats() -> None:
+    with _STATS_LOCK:
+        _ROUTE_STATS.clear()
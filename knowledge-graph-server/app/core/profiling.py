@@ -0,0 +1,302 @@
+import contextvars
+import functools
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request header that asks for a profile of that request.
+PROFILE_HEADER = b"x-profile"
+_PROFILE_ID_HEADER = b"x-profile-id"
+_HEADER_ON_VALUES = {b"1", b"true", b"yes", b"on"}
+
+_DEFAULT_PROFILES_DIR = Path(__file__).resolve().parent.parent / "storage" / "profiles"
+_PROFILE_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{9}-[0-9a-f]{8}$")
+
+# The profile session of the request being handled, if it is being profiled.
+# Copied into threadpool workers along with the rest of the request context.
+_ACTIVE_SESSION: contextvars.ContextVar = contextvars.ContextVar("kg_profile_session", default=None)
+
+
+def _new_profile_id() -> str:
+    # Millisecond timestamp first, so that name order is age order.
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(now))
+    return f"{stamp}{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}"
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    for marker in ("/site-packages/", "/app/", "/lib/"):
+        idx = filename.rfind(marker)
+        if idx != -1:
+            filename = filename[idx + 1:]
+            break
+    # ';' separates frames in the collapsed format.
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class ProfileSession:
+    """
+    Wall-clock stack sampler for one request.
+
+    A background thread samples the stacks of the threads registered with the
+    session (the event loop thread and any handler thread wrapped with
+    `profiled`) every `profiling_interval_ms`, and aggregates them as
+    collapsed stacks. Samples of the event loop waiting for I/O are dropped.
+    """
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.profile_id = _new_profile_id()
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval = max(settings.profiling_interval_ms, 0.5) / 1000.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.status: Optional[int] = None
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="kg-profiler", daemon=True)
+        self._started = 0.0
+        self._duration = 0.0
+
+    def track(self, role: str) -> None:
+        with self._lock:
+            self._threads[threading.get_ident()] = role
+
+    def untrack(self) -> None:
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._duration = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            threads = list(self._threads.items())
+        for ident, role in threads:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            if role == "event-loop" and frame.f_code.co_filename.endswith("selectors.py"):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(f"thread:{role}")
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "created_at": time.time(),
+            "duration_ms": self._duration * 1000,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+        }
+
+
+def profiled(fn):
+    """
+    Let the profiler sample the thread running a (sync) route handler.
+
+    Costs one context variable lookup when the request is not profiled.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = _ACTIVE_SESSION.get()
+        if session is None:
+            return fn(*args, **kwargs)
+        session.track("handler")
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.untrack()
+    return wrapper
+
+
+def _profiles_dir() -> Path:
+    return Path(settings.profiling_dir) if settings.profiling_dir else _DEFAULT_PROFILES_DIR
+
+
+def _trim_ring(directory: Path) -> None:
+    metas = sorted(directory.glob("*.json"))
+    for meta in metas[:max(len(metas) - settings.profiling_max_profiles, 0)]:
+        meta.with_suffix(".collapsed").unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+
+
+def save_profile(session: ProfileSession) -> None:
+    """
+    Write a profile as collapsed stacks plus a metadata file, dropping the
+    oldest profiles beyond `profiling_max_profiles`.
+    """
+    directory = _profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    collapsed = "".join(f"{stack} {count}\n" for stack, count in session.stacks.most_common())
+    (directory / f"{session.profile_id}.collapsed").write_text(collapsed, encoding="utf-8")
+    (directory / f"{session.profile_id}.json").write_text(json.dumps(session.metadata()), encoding="utf-8")
+    _trim_ring(directory)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    List stored profiles, newest first.
+    """
+    directory = _profiles_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for meta in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # Trimmed by another worker while listing, or half written.
+            continue
+    return profiles
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a stored profile's metadata and collapsed stacks.
+
+    Returns:
+        Dictionary with 'metadata' and 'collapsed', or None if there is no such profile
+    """
+    if not _PROFILE_ID_RE.match(profile_id):
+        return None
+    directory = _profiles_dir()
+    try:
+        metadata = json.loads((directory / f"{profile_id}.json").read_text(encoding="utf-8"))
+        collapsed = (directory / f"{profile_id}.collapsed").read_text(encoding="utf-8")
+    except (OSError, ValueError):
+        return None
+    return {"metadata": metadata, "collapsed": collapsed}
+
+
+def to_speedscope(metadata: Dict[str, Any], collapsed: str) -> Dict[str, Any]:
+    """
+    Convert collapsed stacks to a speedscope "sampled" profile.
+    """
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    samples = []
+    weights = []
+    interval_ms = metadata.get("interval_ms", 1.0)
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack:
+            continue
+        sample = []
+        for label in stack.split(";"):
+            idx = frame_index.get(label)
+            if idx is None:
+                idx = frame_index[label] = len(frames)
+                frames.append({"name": label})
+            sample.append(idx)
+        samples.append(sample)
+        weights.append(int(count) * interval_ms)
+
+    name = f"{metadata.get('method', '')} {metadata.get('path', '')} ({metadata.get('id', '')})".strip()
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "knowledge-graph-server",
+    }
+
+
+def _trigger(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return "header" if value.lower() in _HEADER_ON_VALUES else None
+    if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request when it carries `X-Profile: 1` or
+    is picked by `profiling_sample_rate`, and returns the profile id in the
+    `X-Profile-Id` response header.
+
+    When `profiling_enabled` is false the request is passed straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_enabled:
+            await self.app(scope, receive, send)
+            return
+        trigger = _trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"], trigger)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                session.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (_PROFILE_ID_HEADER, session.profile_id.encode("ascii"))
+                ]
+            await send(message)
+
+        session.track("event-loop")
+        token = _ACTIVE_SESSION.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _ACTIVE_SESSION.reset(token)
+            session.stop()
+            if session.samples or trigger == "header":
+                try:
+                    save_profile(session)
+                except OSError:
+                    logger.exception("Failed to save profile %s", session.profile_id)
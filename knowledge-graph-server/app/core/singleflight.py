@@ -0,0 +1,119 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.core.model_router import count_llm_calls
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight (followers) wait for it and receive the same
+    result, or the same exception. Nothing is cached once the call completes.
+    Coalescing is per process.
+
+    The LLM calls each execution actually makes are counted, so calls saved
+    reflect the work followers skipped (e.g. no calls for a cache-like skip,
+    two per extracted block for a generation).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._leaders = 0
+        self._followers = 0
+        self._max_followers = 0
+        self._upstream_calls = 0
+        self._upstream_calls_saved = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn` unless an identical call is already in flight.
+
+        Returns:
+            (result, shared): shared is True if this caller was a follower
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._followers += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        calls = None
+        try:
+            with count_llm_calls() as calls:
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._max_followers = max(self._max_followers, call.followers)
+                if calls is not None:
+                    self._upstream_calls += calls.value
+                    self._upstream_calls_saved += call.followers * calls.value
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executions": self._leaders,
+                "coalesced_requests": self._followers,
+                "in_flight": len(self._calls),
+                "max_followers_per_flight": self._max_followers,
+                "upstream_calls": self._upstream_calls,
+                "upstream_calls_saved": self._upstream_calls_saved,
+            }
+
+
+_FLIGHTS: Dict[str, SingleFlight] = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """
+    Get (or create) the named SingleFlight group.
+    """
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(name)
+        if flight is None:
+            flight = _FLIGHTS[name] = SingleFlight(name)
+        return flight
+
+
+def get_coalescing_stats() -> Dict[str, Any]:
+    """
+    Get coalescing statistics for every SingleFlight group.
+    """
+    with _FLIGHTS_LOCK:
+        flights = list(_FLIGHTS.values())
+    per_flight = {flight.name: flight.stats() for flight in flights}
+    return {
+        "flights": per_flight,
+        "upstream_calls_saved": sum(s["upstream_calls_saved"] for s in per_flight.values()),
+    }
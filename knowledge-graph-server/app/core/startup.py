@@ -1,4 +1,109 @@
-from app.core.llm import init_llm
+import threading
+import time
+from typing import Dict, Any
+
+from app.core.config import settings
+from app.core.llm import init_llm, get_llm
+
+# Set once every warm-up step has run; backs the readiness probe.
+_READY = threading.Event()
+
+# Wall-clock timings (in seconds) of the startup phases, for the readiness
+# probe and the startup benchmark.
+_STARTUP_TIMINGS: Dict[str, float] = {}
+_STARTUP_ERRORS: Dict[str, str] = {}
+_STARTUP_STARTED_AT = time.perf_counter()
+
+
+def _timed(step: str, fn) -> None:
+    """
+    Run a warm-up step, recording its duration. Failures are recorded but never
+    raised: a cold cache only costs latency, it must not keep a worker down.
+    """
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        _STARTUP_ERRORS[step] = str(e)
+    finally:
+        _STARTUP_TIMINGS[step] = time.perf_counter() - started
+
+
+def _warm_imports() -> None:
+    # Pull in the heavy modules deferred from import time so the first
+    # /generate-knowledge-graph request does not pay for them.
+    import numpy  # noqa: F401
+    import app.services.kg_graph  # noqa: F401
+
+
+def _warm_graph_cache() -> None:
+    from app.storage.cache import load_last_kg
+    load_last_kg()
+
+
+def _warm_prompt_cache() -> None:
+    from app.services.kg_extractor import warm_prompt_cache
+    warm_prompt_cache()
+
+
+def _warm_near_duplicate_index() -> None:
+    # Loads every stored MinHash signature, which takes seconds at millions of documents.
+    from app.services.near_duplicates import get_index
+    get_index()
+
+
+def _warm_llm_connection() -> None:
+    # A cheap authenticated request opens the TLS connection that the client's
+    # HTTP pool keeps alive for the first real completion. Readiness waits for
+    # it, so a stalled provider must not hold it for the client's default
+    # timeout and retries; the copy made by with_options shares the pool.
+    get_llm().with_options(timeout=settings.warmup_llm_timeout_seconds, max_retries=0).models.list()
+
+
+def warm_up() -> None:
+    """
+    Run all warm-up steps and mark the worker ready.
+    """
+    _timed("llm_client", init_llm)
+    _timed("imports", _warm_imports)
+    _timed("graph_cache", _warm_graph_cache)
+    _timed("prompt_cache", _warm_prompt_cache)
+    if settings.near_duplicate_enabled:
+        _timed("near_duplicate_index", _warm_near_duplicate_index)
+    if settings.warmup_llm_connection:
+        _timed("llm_connection", _warm_llm_connection)
+
+    _STARTUP_TIMINGS["total"] = time.perf_counter() - _STARTUP_STARTED_AT
+    _READY.set()
+
+
+def is_ready() -> bool:
+    return _READY.is_set()
+
+
+def wait_until_ready(timeout: float = None) -> bool:
+    return _READY.wait(timeout)
+
+
+def get_startup_report() -> Dict[str, Any]:
+    """
+    Get the readiness state together with the recorded startup timings.
+
+    Returns:
+        Dictionary with 'ready', 'timings', 'errors', 'budget_seconds' and 'within_budget'
+    """
+    total = _STARTUP_TIMINGS.get("total")
+    return {
+        "ready": is_ready(),
+        "timings": dict(_STARTUP_TIMINGS),
+        "errors": dict(_STARTUP_ERRORS),
+        "budget_seconds": settings.startup_budget_seconds,
+        "within_budget": total is not None and total <= settings.startup_budget_seconds,
+    }
+
 
 def on_startup():
-    init_llm()
\ No newline at end of file
+    if settings.warmup_in_background:
+        threading.Thread(target=warm_up, name="kg-warmup", daemon=True).start()
+    else:
+        warm_up()
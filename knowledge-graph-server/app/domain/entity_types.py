@@ -8,4 +8,5 @@ ALLOWED_ENTITY_TYPES = [
     "REGION",
     "COUNTRY",
     "DOCUMENT",
+    "ASSET_NETWORK",
 ]
\ No newline at end of file
@@ -8,4 +8,5 @@ ALLOWED_METRIC_TYPES = [
     "SALES",
     "PROFIT",
     "EBITDA",
+    "COUNT",
 ]
\ No newline at end of file
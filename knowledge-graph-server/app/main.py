@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.profiling import ProfilingMiddleware
 from app.core.startup import on_startup
-from app.api.routes import kg, metadata, export
+from app.api.routes import kg, metadata, export, health, metrics, admin
 
 app = FastAPI(title="Knowledge Graph API")
 
@@ -14,8 +15,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Opt-in per-request profiling (X-Profile header or sampling, see core/profiling.py)
+app.add_middleware(ProfilingMiddleware)
+
 app.add_event_handler("startup", on_startup)
 
 app.include_router(kg.router, prefix="/api")
 app.include_router(metadata.router, prefix="/api")
-app.include_router(export.router, prefix="/api")
\ No newline at end of file
+app.include_router(export.router, prefix="/api")
+app.include_router(health.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
\ No newline at end of file
@@ -1,7 +1,23 @@
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 class KGGenerateRequest(BaseModel):
     text: str
+    # Fraction of sentence tokens kept by pre-extraction reduction; defaults to the configured ratio
+    keep_ratio: Optional[float] = None
+
+class KGBatchDocument(BaseModel):
+    # Echoed back in the document's result line; defaults to its index
+    id: Optional[str] = None
+    text: str
+    keep_ratio: Optional[float] = None
+
+class KGBatchGenerateRequest(BaseModel):
+    documents: List[KGBatchDocument]
+    # "completion": stream each result as soon as it is ready; "input": in request order
+    order: Literal["completion", "input"] = "completion"
+    # Documents of this batch processed at once, capped by batch_max_concurrency
+    concurrency: Optional[int] = None
 
 class KGQueryRequest(BaseModel):
     query: str
\ No newline at end of file
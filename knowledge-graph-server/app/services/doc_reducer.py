@@ -0,0 +1,347 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from app.domain.predicate_types import ALLOWED_PREDICATE_TYPES
+
+# Lines that are only a page number, e.g. "12", "Page 3", "3 of 40", "- 7 -".
+# A bare number is only taken for one when it stands alone between blank
+# lines: inside a block of lines it is more likely a table cell.
+_PAGE_NUMBER_RE = re.compile(r"^[\s\-–—]*(page\s*)?\d{1,4}(\s*(of|/)\s*\d{1,4})?[\s\-–—]*$", re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r"^\d{1,4}$")
+# A page number at the end of a running header or footer, e.g. "Annual Report | Page 3".
+_TRAILING_PAGE_NUMBER_RE = re.compile(r"[\s\-–—|·•]*(page\s*)?\d{1,4}(\s*(of|/)\s*\d{1,4})?[\s\-–—]*$", re.IGNORECASE)
+# Table-of-contents entries: a trailing page number after dot leaders. Entries
+# without leaders are only dropped inside a "Contents" section, since a number
+# after a gap of spaces is also what a fixed-width table row looks like.
+_TOC_LINE_RE = re.compile(r"(\.{3,}|…+)\s*\d{1,4}\s*$")
+_TOC_HEADING_RE = re.compile(r"^\s*(table of )?contents\s*$", re.IGNORECASE)
+_DISCLAIMER_RE = re.compile(
+    r"forward[- ]looking statements?|safe harbou?r|all rights reserved|does not constitute an? (offer|solicitation)"
+    r"|for informational purposes only|no representation or warranty|copyright ©|^\s*disclaimer\b",
+    re.IGNORECASE,
+)
+_DISCLAIMER_HEADING_RE = re.compile(r"^\s*disclaimer\b", re.IGNORECASE)
+
+# Sentence boundary: terminal punctuation, whitespace, then something that can
+# start a sentence. Common abbreviations are protected before splitting.
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"”')\]]?\s+(?=[A-Z0-9\"“(\[])")
+_ABBREVIATIONS = [
+    "Ltd.", "Inc.", "Co.", "Corp.", "Pvt.", "Plc.", "No.", "Nos.", "Rs.", "Mr.", "Ms.", "Mrs.", "Dr.",
+    "approx.", "vs.", "e.g.", "i.e.", "etc.", "U.S.", "U.K.", "St.", "Jan.", "Feb.", "Mar.", "Apr.",
+    "Jun.", "Jul.", "Aug.", "Sep.", "Sept.", "Oct.", "Nov.", "Dec.", "FY.", "Q1.", "Q2.", "Q3.", "Q4.",
+]
+_ABBREVIATION_MARK = "\x00"
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z&'\-]*|\d[\d,.]*%?")
+_NUMBER_RE = re.compile(r"\d[\d,.]*")
+_CURRENCY_UNIT_TOKENS = {
+    "inr", "usd", "eur", "gbp", "jpy", "cny", "rs", "rupees", "dollars", "euro", "euros",
+    "thousand", "million", "billion", "trillion", "mn", "bn", "tn", "crore", "crores", "lakh", "lakhs",
+    "mmt", "mt", "tonnes", "tons", "barrels", "bbl", "mw", "gw", "kwh", "mwh", "bps", "percent",
+}
+_CURRENCY_SYMBOLS = "₹$€£¥%"
+_PREDICATE_STOPWORDS = {"of", "in", "by", "as", "with", "from", "has", "to", "on", "is"}
+
+
+def _predicate_stems() -> List[str]:
+    """
+    Word stems hinting at an allowed predicate, e.g. ACQUIRED_STAKE_IN -> "acqui", "stake".
+    """
+    stems = set()
+    for predicate in ALLOWED_PREDICATE_TYPES:
+        for word in predicate.lower().split("_"):
+            if word not in _PREDICATE_STOPWORDS and len(word) > 2:
+                stems.add(word[:5])
+    return sorted(stems)
+
+
+_PREDICATE_STEMS = _predicate_stems()
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"documents": 0, "original_tokens": 0, "reduced_tokens": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token for English text).
+    """
+    return math.ceil(len(text) / 4)
+
+
+def _header_key(line: str) -> Optional[str]:
+    """
+    Key under which a line may be a running header or footer: the line
+    without a trailing page number, or None if what is left states a figure
+    (table rows and lists of figures also repeat with only their numbers
+    changed, and are content).
+    """
+    key = _TRAILING_PAGE_NUMBER_RE.sub("", line).lower()
+    if not key or len(line) > 100 or _has_figure(key):
+        return None
+    return key
+
+
+def _normalise_paragraphs(texts: List[str]) -> List[Tuple[int, List[str]]]:
+    """
+    Normalise whitespace and split into paragraphs of lines, dropping page
+    numbers, table-of-contents entries and lines repeated across the document
+    (running headers and footers).
+
+    Args:
+        texts: The document, as one or more consecutive parts
+
+    Returns:
+        List of (index of the part it comes from, lines)
+    """
+    origins: List[int] = []
+    lines: List[str] = []
+    for origin, text in enumerate(texts):
+        text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ")
+        for line in text.split("\n") + [""]:
+            origins.append(origin)
+            lines.append(re.sub(r"[ \t\f\v]+", " ", line).strip())
+
+    # Running headers/footers: the same short text on at least three pages,
+    # possibly followed by the page number.
+    line_keys = [_header_key(line) if line else None for line in lines]
+    counts = Counter(key for key in line_keys if key is not None)
+    repeated = {key for key, n in counts.items() if n >= 3}
+
+    paragraphs: List[Tuple[int, List[str]]] = []
+    current: List[str] = []
+    in_toc = False
+    for i, (origin, line, key) in enumerate(zip(origins, lines, line_keys)):
+        if not line:
+            if current:
+                paragraphs.append((origin, current))
+                current = []
+            in_toc = False
+            continue
+        if _TOC_HEADING_RE.match(line):
+            in_toc = True
+            continue
+        if key in repeated or _TOC_LINE_RE.search(line):
+            continue
+        if _PAGE_NUMBER_RE.match(line):
+            alone = (i == 0 or not lines[i - 1]) and (i + 1 == len(lines) or not lines[i + 1])
+            if alone or not _BARE_NUMBER_RE.match(line):
+                continue
+        if in_toc and len(line) <= 80:
+            continue
+        in_toc = False
+        current.append(line)
+
+    return paragraphs
+
+
+def _strip_disclaimers(sentences: List[str]) -> List[str]:
+    """
+    Drop legal boilerplate sentences (every sentence of a paragraph headed
+    "Disclaimer"), except those that state a figure: an outlook section
+    titled "Forward-looking statements" carries guidance worth extracting.
+    """
+    if sentences and _DISCLAIMER_HEADING_RE.match(sentences[0]):
+        return [s for s in sentences if _has_figure(s)]
+    return [s for s in sentences if not _DISCLAIMER_RE.search(s) or _has_figure(s)]
+
+
+def _has_figure(text: str) -> bool:
+    """
+    Whether the text states a figure: a number, currency symbol or unit.
+    """
+    if _NUMBER_RE.search(text) or any(symbol in text for symbol in _CURRENCY_SYMBOLS):
+        return True
+    return any(w.lower() in _CURRENCY_UNIT_TOKENS for w in _WORD_RE.findall(text))
+
+
+def _is_heading(lines: List[str]) -> bool:
+    # A short line with a figure ("EBITDA: INR 200 crore") is content, not a heading.
+    joined = " ".join(lines)
+    return (
+        len(lines) == 1
+        and len(joined.split()) <= 10
+        and not joined.endswith((".", "!", "?", ";", ","))
+        and not _has_figure(joined)
+    )
+
+
+def _split_sentences(paragraph: str) -> List[str]:
+    protected = paragraph
+    for abbreviation in _ABBREVIATIONS:
+        protected = protected.replace(abbreviation, abbreviation[:-1] + _ABBREVIATION_MARK)
+    return [s.replace(_ABBREVIATION_MARK, ".") for s in _SENTENCE_SPLIT_RE.split(protected) if s.strip()]
+
+
+def score_sentence(sentence: str) -> float:
+    """
+    Score a sentence for financial signal.
+
+    Counts numbers, currency and unit tokens, capitalised entity candidates
+    and words that hint at an allowed predicate. Each count is capped, so long
+    sentences do not win on size alone, but a long sentence packed with facts
+    is not penalised for its length either.
+    """
+    words = _WORD_RE.findall(sentence)
+    if not words:
+        return 0.0
+
+    numbers = len(_NUMBER_RE.findall(sentence))
+    units = sum(1 for w in words if w.lower() in _CURRENCY_UNIT_TOKENS)
+    units += sum(sentence.count(symbol) for symbol in _CURRENCY_SYMBOLS)
+    # Capitalised words after the first are entity candidates.
+    entities = sum(1 for w in words[1:] if w[0].isupper())
+    predicates = sum(1 for w in words if any(w.lower().startswith(stem) for stem in _PREDICATE_STEMS))
+
+    return 2.0 * min(numbers, 6) + 2.0 * min(units, 4) + 1.0 * min(entities, 6) + 1.5 * min(predicates, 4)
+
+
+def _reduce(
+    texts: List[str],
+    keep_ratio: Optional[float],
+    document_chars: Optional[int]
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Reduce a document given as consecutive parts.
+
+    Returns:
+        (reduced parts, one per input part, possibly empty; stats)
+    """
+    if keep_ratio is None:
+        keep_ratio = settings.doc_reduction_keep_ratio
+    keep_ratio = min(max(keep_ratio, 0.0), 1.0)
+
+    paragraphs = []
+    for origin, lines in _normalise_paragraphs(texts):
+        if _is_heading(lines):
+            if not _DISCLAIMER_RE.search(lines[0]):
+                paragraphs.append({"origin": origin, "heading": lines[0], "sentences": []})
+            continue
+        sentences = _strip_disclaimers(_split_sentences(" ".join(lines)))
+        if sentences:
+            paragraphs.append({"origin": origin, "heading": None, "sentences": sentences})
+
+    sentences = [(pi, si, s) for pi, p in enumerate(paragraphs) for si, s in enumerate(p["sentences"])]
+    keep = {(pi, si) for pi, si, _ in sentences}
+
+    text = "\n\n".join(texts)
+    if document_chars is None:
+        document_chars = len(text)
+
+    if document_chars >= settings.doc_reduction_min_chars and keep_ratio < 1.0 and sentences:
+        budget = keep_ratio * sum(estimate_tokens(s) for _, _, s in sentences)
+        # Figures are what extraction is after: those sentences are never dropped.
+        keep = {(pi, si) for pi, si, s in sentences if _has_figure(s)}
+        kept_tokens = sum(estimate_tokens(s) for pi, si, s in sentences if (pi, si) in keep)
+        ranked = sorted(
+            (item for item in sentences if (item[0], item[1]) not in keep),
+            key=lambda item: (-score_sentence(item[2]), len(item[2]))
+        )
+        for pi, si, sentence in ranked:
+            if kept_tokens >= budget:
+                break
+            keep.add((pi, si))
+            kept_tokens += estimate_tokens(sentence)
+    pruned = len(keep) < len(sentences)
+
+    blocks = []
+    for pi, p in enumerate(paragraphs):
+        if p["heading"] is not None:
+            # Once sentences are dropped, a heading is only kept if some
+            # content still follows before the next one.
+            if pruned and blocks and blocks[-1][1]:
+                blocks.pop()
+            blocks.append((p["origin"], True, p["heading"]))
+            continue
+        kept = [s for si, s in enumerate(p["sentences"]) if (pi, si) in keep]
+        if kept:
+            blocks.append((p["origin"], False, " ".join(kept)))
+    if pruned and blocks and blocks[-1][1]:
+        blocks.pop()
+
+    parts: List[List[str]] = [[] for _ in texts]
+    for origin, _, block in blocks:
+        parts[origin].append(block)
+    reduced = ["\n\n".join(part) for part in parts]
+    if not any(part.strip() for part in reduced) and text.strip():
+        # Everything looked like boilerplate: hand the extractor the text as is
+        # rather than an empty document.
+        reduced = [t.strip() for t in texts]
+
+    original_tokens = estimate_tokens(text)
+    reduced_tokens = estimate_tokens("\n\n".join(part for part in reduced if part))
+    with _STATS_LOCK:
+        _STATS["documents"] += 1
+        _STATS["original_tokens"] += original_tokens
+        _STATS["reduced_tokens"] += reduced_tokens
+
+    return reduced, {
+        "original_tokens": original_tokens,
+        "reduced_tokens": reduced_tokens,
+        "tokens_saved": original_tokens - reduced_tokens,
+        "sentences_total": len(sentences),
+        "sentences_kept": len(keep),
+    }
+
+
+def reduce_document(
+    text: str,
+    keep_ratio: Optional[float] = None,
+    document_chars: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Reduce a document before LLM extraction.
+
+    Normalises whitespace, strips boilerplate (running headers/footers, page
+    numbers, tables of contents, legal disclaimers), segments sentences and,
+    for documents longer than `doc_reduction_min_chars`, keeps the highest
+    scoring sentences until `keep_ratio` of the sentence tokens is reached.
+    Sentences stating a figure are always kept, so the ratio is a target.
+    The original sentence order is preserved, and headings are kept unless
+    every sentence under them was dropped. Non-empty input never reduces to
+    empty text.
+
+    Args:
+        text: Raw document text
+        keep_ratio: Fraction of sentence tokens to keep; defaults to `doc_reduction_keep_ratio`
+        document_chars: Length of the whole document when `text` is one block of it,
+            for the `doc_reduction_min_chars` check; defaults to len(text)
+
+    Returns:
+        Dictionary with the reduced 'text', 'original_tokens', 'reduced_tokens',
+        'tokens_saved', 'sentences_total' and 'sentences_kept'
+    """
+    reduced, stats = _reduce([text], keep_ratio, document_chars)
+    return dict(stats, text=reduced[0])
+
+
+def reduce_paragraphs(
+    paragraphs: List[str],
+    keep_ratio: Optional[float] = None,
+    document_chars: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Reduce consecutive paragraphs of a document as one text (same rules as
+    `reduce_document`), keeping track of which paragraph each kept piece of
+    text came from.
+
+    Returns:
+        Dictionary with 'paragraphs' (the reduced text of each input
+        paragraph, empty if all of it was dropped) and the same stats as
+        `reduce_document`
+    """
+    reduced, stats = _reduce(paragraphs, keep_ratio, document_chars)
+    return dict(stats, paragraphs=reduced)
+
+
+def get_reduction_stats() -> Dict[str, Any]:
+    """
+    Get cumulative document reduction statistics for this process.
+    """
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    stats["tokens_saved"] = stats["original_tokens"] - stats["reduced_tokens"]
+    stats["saved_ratio"] = stats["tokens_saved"] / stats["original_tokens"] if stats["original_tokens"] else 0.0
+    return stats
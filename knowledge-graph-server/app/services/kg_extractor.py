@@ -1,15 +1,33 @@
 import json
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from app.core.llm import get_llm
-from app.core.config import settings
+from app.core.model_router import (
+    EXTRACTION, TRIPLETS, chat_completion, extraction_models, record_escalation, stage_model
+)
 from app.domain.entity_types import ALLOWED_ENTITY_TYPES
 from app.domain.metric_types import ALLOWED_METRIC_TYPES
+from app.services.kg_validator import validate_kg
+
+
+# Placeholder substituted for the document text when pre-rendering the prompt.
+_TEXT_CONTEXT_MARKER = "\x00TEXT_CONTEXT\x00"
 
 
 def _build_system_prompt(text_context: str) -> str:
     """
     Build the system prompt for knowledge graph extraction.
     """
+    head, tail = _system_prompt_parts()
+    return head + text_context + tail
+
+
+@lru_cache(maxsize=1)
+def _system_prompt_parts() -> Tuple[str, str]:
+    """
+    Render the static part of the extraction prompt once and split it around
+    the text context, so each request only concatenates the document text.
+    """
     allowed_entity_type = "\n".join(ALLOWED_ENTITY_TYPES)
     allowed_metric_type = "\n".join(ALLOWED_METRIC_TYPES)
 
@@ -71,6 +89,7 @@ Any output that is not valid JSON
     - Must be strict triplets: subject, predicate, object.
     - subject and object must reference IDs defined in entities or measurements.
     - Free-text objects are forbidden.
+    - Each fact names the paragraph that states it (see PARAGRAPH TAGS).
 
     5. Forbidden:
     - Numeric literals as entities
@@ -164,10 +183,17 @@ Any output that is not valid JSON
         {{
             "subject": "E<ID>",
             "predicate": "PREDICATE_TYPE",
-            "object": "E<ID> | M<ID>"
+            "object": "E<ID> | M<ID>",
+            "paragraph": "P<N>"
         }}
     ]
 
+    PARAGRAPH TAGS (MANDATORY):
+    - Every paragraph of the text starts with a tag such as [P1], [P2], …
+    - Every fact MUST include "paragraph": the tag of the paragraph that states it, without brackets (e.g. "P2")
+    - If a fact draws on several paragraphs, use the paragraph where the relationship itself is stated
+    - Tags are not part of the text: never extract them as entities or measurements
+
     ALLOWED_PREDICATES:
     {allowed_predicates}
 
@@ -187,7 +213,9 @@ Any output that is not valid JSON
 
     EXAMPLE OUTPUT:
     Input text (example)
-    Global ethylene demand was 185 MMT in CY24. Jio-bp operates 1,916 mobility stations across India.
+    [P1] Global ethylene demand was 185 MMT in CY24.
+
+    [P2] Jio-bp operates 1,916 mobility stations across India.
 
     Output:
     {{
@@ -231,17 +259,20 @@ Any output that is not valid JSON
             {{
                 "subject": "E1",
                 "predicate": "HAS_MEASUREMENT",
-                "object": "M1"
+                "object": "M1",
+                "paragraph": "P1"
             }},
             {{
                 "subject": "E2",
                 "predicate": "OWNS",
-                "object": "E3"
+                "object": "E3",
+                "paragraph": "P2"
             }},
             {{
                 "subject": "E3",
                 "predicate": "HAS_MEASUREMENT",
-                "object": "M2"
+                "object": "M2",
+                "paragraph": "P2"
             }}
         ]
     }}
@@ -254,49 +285,44 @@ Any output that is not valid JSON
     >>>
     """
     
-    return system_prompt.format(
-        text_context=text_context,
+    rendered = system_prompt.format(
+        text_context=_TEXT_CONTEXT_MARKER,
         forbidden_patterns=forbidden_patterns,
         allowed_predicates=allowed_predicates,
         allowed_metric_type=allowed_metric_type,
         allowed_entity_type=allowed_entity_type
     )
+    head, _, tail = rendered.partition(_TEXT_CONTEXT_MARKER)
+    return head, tail
 
 
-def prune_isolated_nodes(graph: Dict[str, Any]) -> Dict[str, Any]:
+def warm_prompt_cache() -> None:
     """
-    Remove entities and measurements that are not referenced in any facts.
+    Pre-render the static extraction prompt. Called during startup warm-up.
     """
-    used_entities = set()
-    used_measurements = set()
+    _system_prompt_parts()
 
-    for fact in graph["facts"]:
-        used_entities.add(fact["subject"])
 
-        if fact["object"].startswith("E"):
-            used_entities.add(fact["object"])
-        elif fact["object"].startswith("M"):
-            used_measurements.add(fact["object"])
-
-    graph["entities"] = {
-        eid: e for eid, e in graph["entities"].items()
-        if eid in used_entities
-    }
-
-    graph["measurements"] = {
-        mid: m for mid, m in graph["measurements"].items()
-        if mid in used_measurements
-    }
+def prune_isolated_nodes(graph: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove entities and measurements that are not referenced in any facts.
+    """
+    from app.services.kg_graph import CompactKG  # numpy-backed, imported on first use
 
+    pruned = CompactKG.from_dict(graph).prune_isolated().to_dict()
+    graph["entities"] = pruned["entities"]
+    graph["measurements"] = pruned["measurements"]
     return graph
 
 
-def extract_knowledge_graph(text: str) -> Dict[str, Any]:
+def extract_knowledge_graph(text: str, document_chars: Optional[int] = None) -> Dict[str, Any]:
     """
     Extract knowledge graph from text using LLM.
     
     Args:
         text: Input text to extract knowledge graph from
+        document_chars: Length of the whole document when `text` is a part of
+            it, used to route the extraction model; defaults to len(text)
         
     Returns:
         Dictionary containing entities, measurements, and facts
@@ -306,21 +332,38 @@ def extract_knowledge_graph(text: str) -> Dict[str, Any]:
         raise RuntimeError("LLM client not initialized. Call init_llm() first.")
     
     system_prompt = _build_system_prompt(text)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": "Please extract the knowledge graph from the provided text context."}
+    ]
     
-    # Make API call to LLM for knowledge graph extraction
-    response = client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "Please extract the knowledge graph from the provided text context."}
-        ],
-        temperature=0.3  # Lower temperature for more consistent extraction
-    )
-    
-    # Parse the extracted knowledge graph
-    extracted_kg_string = response.choices[0].message.content
-    # Parse JSON response
-    extracted_kg = json.loads(extracted_kg_string)
+    # Try the routed model(s) in order; in cascade mode a cheaper model's output
+    # is kept only if it passes ontology validation, otherwise we escalate.
+    models = extraction_models(document_chars if document_chars is not None else len(text))
+    for i, model in enumerate(models):
+        # Make API call to LLM for knowledge graph extraction
+        response = chat_completion(
+            EXTRACTION,
+            model,
+            messages=messages,
+            temperature=0.3  # Lower temperature for more consistent extraction
+        )
+        
+        # Parse the extracted knowledge graph
+        extracted_kg_string = response.choices[0].message.content
+        if i == len(models) - 1:
+            # Parse JSON response
+            extracted_kg = json.loads(extracted_kg_string)
+            break
+        
+        try:
+            extracted_kg = json.loads(extracted_kg_string)
+            errors = validate_kg(extracted_kg)
+        except json.JSONDecodeError as e:
+            errors = [f"Invalid JSON: {e}"]
+        if not errors:
+            break
+        record_escalation(EXTRACTION, model)
     
     # Prune isolated nodes
     extracted_kg = prune_isolated_nodes(extracted_kg)
@@ -375,7 +418,8 @@ EXTRACTED_FROM_DOCUMENT, EXTRACTED_FROM_PAGE
     
     Output Format:
     - Output must be plain text.
-    - Line Separated List of Triplets - (SUBJECT, PREDICATE, OBJECT)
+    - Line Separated List of Triplets - [PARAGRAPH] (SUBJECT, PREDICATE, OBJECT)
+    - Start every line with the "paragraph" tag of the fact it comes from, in square brackets (e.g. [P2]).
     - SUBJECT and OBJECT must always be human-readable names or values, never internal IDs (e.g., E1, M1). 
     - Measurements must be fully resolved:
         - Replace measurement IDs with their actual numeric value, unit, and period (if present).
@@ -386,12 +430,12 @@ EXTRACTED_FROM_DOCUMENT, EXTRACTED_FROM_PAGE
     - Using HAS_MEASUREMENT and REPORTED_IN_PERIOD is not allowed as a predicate. (Very Important)
 
     Examples:
-    (XYZ Global Holdings Limited, HAS_COUNTRY, India)
-    (XYZ Energy & Chemicals Limited, OWNERSHIP_PERCENTAGE, 100%)
-    (NovaPolymers BV, HAS_COUNTRY, Netherlands)
-    (XYZ Global Holdings Limited, ACQUIRED, XYZ Retail & Consumer Services Limited)
-    (XYZ Global Holdings Limited, REPORTED_REVENUE, INR 1,146,000,000,000 in FY 2024–25)
-    (Energy, Chemicals & Materials Segment, PROFIT, INR 912,000,000,000 in FY 2024–25)
+    [P1] (XYZ Global Holdings Limited, HAS_COUNTRY, India)
+    [P2] (XYZ Energy & Chemicals Limited, OWNERSHIP_PERCENTAGE, 100%)
+    [P2] (NovaPolymers BV, HAS_COUNTRY, Netherlands)
+    [P3] (XYZ Global Holdings Limited, ACQUIRED, XYZ Retail & Consumer Services Limited)
+    [P1] (XYZ Global Holdings Limited, REPORTED_REVENUE, INR 1,146,000,000,000 in FY 2024–25)
+    [P4] (Energy, Chemicals & Materials Segment, PROFIT, INR 912,000,000,000 in FY 2024–25)
 
     Output Constraints:
     - No JSON.
@@ -422,7 +466,8 @@ def extract_factual_triplets(knowledge_graph: Dict[str, Any]) -> str:
         knowledge_graph: Dictionary containing entities, measurements, and facts
         
     Returns:
-        String containing line-separated triplets in the format (SUBJECT, PREDICATE, OBJECT)
+        String containing line-separated triplets in the format [PARAGRAPH] (SUBJECT, PREDICATE, OBJECT),
+        the paragraph being the tag of the fact the triplet comes from
         
     Raises:
         RuntimeError: If LLM client is not initialized
@@ -438,8 +483,9 @@ def extract_factual_triplets(knowledge_graph: Dict[str, Any]) -> str:
     system_prompt = _build_extract_triplets_system_prompt(extracted_kg_string)
     
     # Make API call to LLM for triplet extraction
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    response = chat_completion(
+        TRIPLETS,
+        stage_model(TRIPLETS),
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": "Please extract the factual triplets from the provided text context."}
@@ -0,0 +1,499 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+ENTITY = 0
+MEASUREMENT = 1
+# Referenced by a fact but not defined in entities or measurements.
+DANGLING = 2
+
+
+class Interner:
+    """
+    Bidirectional string <-> integer id table.
+    """
+    __slots__ = ("_ids", "_strings")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self._strings)
+            self._ids[value] = idx
+            self._strings.append(value)
+        return idx
+
+    def get(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+    def __getitem__(self, idx: int) -> str:
+        return self._strings[idx]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._ids
+
+
+def _csr(keys: np.ndarray, num_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a CSR index over edge positions grouped by `keys`.
+
+    Returns:
+        (indptr, edge_order): the edges of row i are edge_order[indptr[i]:indptr[i + 1]],
+        in fact order.
+    """
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    counts = np.bincount(keys, minlength=num_rows)
+    indptr = np.zeros(num_rows + 1, dtype=np.int32)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, order
+
+
+# String record fields stored as Interner codes, by node kind.
+_STRING_COLUMNS = {ENTITY: ("name",), MEASUREMENT: ("metric", "unit", "period")}
+# Value of a measurement record without a "value" field.
+_ABSENT = object()
+
+
+class NodeRecords:
+    """
+    Entity and measurement records stored column-wise.
+
+    Entity names and measurement metrics, units and periods are codes into
+    one string Interner (-1 where the field is absent), and measurement
+    values are kept in a list so that their JSON type (int, float or
+    string) survives. Entity properties and any other record fields are
+    rare, so they are kept in dicts keyed by node index, holding only the
+    nodes that have them. Entity types are the node groups of the graph.
+    """
+    __slots__ = ("strings", "name", "metric", "unit", "period", "values", "properties", "extras")
+
+    def __init__(
+        self,
+        strings: Interner,
+        name: np.ndarray,
+        metric: np.ndarray,
+        unit: np.ndarray,
+        period: np.ndarray,
+        values: List[Any],
+        properties: Dict[int, Dict[str, Any]],
+        extras: Dict[int, Dict[str, Any]],
+    ):
+        self.strings = strings
+        self.name = name
+        self.metric = metric
+        self.unit = unit
+        self.period = period
+        self.values = values
+        self.properties = properties
+        self.extras = extras
+
+    @classmethod
+    def build(cls, records: List[Tuple[int, Optional[Dict[str, Any]]]]) -> "NodeRecords":
+        """
+        Store (kind, record dict or None) per node, in node order. Fields
+        that do not fit their column (e.g. a name that is not a string) are
+        kept as they are, with the other fields.
+        """
+        strings = Interner()
+        n = len(records)
+        columns = {field: np.full(n, -1, dtype=np.int32) for field in ("name", "metric", "unit", "period")}
+        values: List[Any] = [None] * n
+        properties: Dict[int, Dict[str, Any]] = {}
+        extras: Dict[int, Dict[str, Any]] = {}
+
+        for i, (kind, record) in enumerate(records):
+            if record is None:
+                continue
+            rest = {}
+            for field, value in record.items():
+                if field in _STRING_COLUMNS[kind] and isinstance(value, str):
+                    columns[field][i] = strings.intern(value)
+                elif kind == ENTITY and field == "type" and isinstance(value, str):
+                    pass  # the node group
+                elif kind == ENTITY and field == "properties" and isinstance(value, dict):
+                    if value:
+                        properties[i] = value
+                elif kind == MEASUREMENT and field == "value":
+                    values[i] = value
+                else:
+                    rest[field] = value
+            if kind == MEASUREMENT and "value" not in record:
+                values[i] = _ABSENT
+            if rest:
+                extras[i] = rest
+        return cls(
+            strings, columns["name"], columns["metric"], columns["unit"], columns["period"], values, properties, extras
+        )
+
+    def take(self, indices: np.ndarray, cleared: np.ndarray) -> "NodeRecords":
+        """
+        Records of the nodes at `indices`, in that order, with the nodes
+        where `cleared` (indexed like `indices`) left without a record.
+        """
+        keep = np.flatnonzero(~cleared)
+        new_index = {int(indices[j]): int(j) for j in keep}
+
+        def column(values: np.ndarray) -> np.ndarray:
+            taken = values[indices]
+            taken[cleared] = -1
+            return taken
+
+        return NodeRecords(
+            self.strings,
+            column(self.name),
+            column(self.metric),
+            column(self.unit),
+            column(self.period),
+            [None if gone else self.values[i] for i, gone in zip(indices.tolist(), cleared.tolist())],
+            {new_index[i]: v for i, v in self.properties.items() if i in new_index},
+            {new_index[i]: v for i, v in self.extras.items() if i in new_index},
+        )
+
+    def entity(self, i: int, entity_type: Optional[str]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        if self.name[i] >= 0:
+            record["name"] = self.strings[self.name[i]]
+        if entity_type is not None:
+            record["type"] = entity_type
+        record["properties"] = self.properties.get(i, {})
+        record.update(self.extras.get(i, ()))
+        return record
+
+    def measurement(self, i: int) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        if self.metric[i] >= 0:
+            record["metric"] = self.strings[self.metric[i]]
+        if self.values[i] is not _ABSENT:
+            record["value"] = self.values[i]
+        if self.unit[i] >= 0:
+            record["unit"] = self.strings[self.unit[i]]
+        if self.period[i] >= 0:
+            record["period"] = self.strings[self.period[i]]
+        record.update(self.extras.get(i, ()))
+        return record
+
+
+class CompactKG:
+    """
+    Compact in-memory knowledge graph.
+
+    Node and predicate ids are interned to integers. Nodes are stored
+    column-wise (kind, group code, and the entity and measurement fields in
+    `records`), and facts as parallel (subject, predicate, object) integer
+    arrays with CSR forward and reverse adjacency.
+
+    `from_dict` orders nodes as entities, then measurements (both in input
+    order), then dangling ids that facts reference without a definition.
+    """
+    __slots__ = (
+        "node_ids", "node_index", "node_kind", "node_group", "groups", "records",
+        "predicates", "edge_src", "edge_pred", "edge_dst",
+        "out_indptr", "out_edges", "in_indptr", "in_edges",
+    )
+
+    def __init__(
+        self,
+        node_ids: List[str],
+        node_kind: np.ndarray,
+        node_group: np.ndarray,
+        groups: Interner,
+        records: NodeRecords,
+        predicates: Interner,
+        edge_src: np.ndarray,
+        edge_pred: np.ndarray,
+        edge_dst: np.ndarray,
+    ):
+        self.node_ids = node_ids
+        self.node_index = {nid: i for i, nid in enumerate(node_ids)}
+        self.node_kind = node_kind
+        self.node_group = node_group
+        self.groups = groups
+        self.records = records
+        self.predicates = predicates
+        self.edge_src = edge_src
+        self.edge_pred = edge_pred
+        self.edge_dst = edge_dst
+        self.out_indptr, self.out_edges = _csr(edge_src, len(node_ids))
+        self.in_indptr, self.in_edges = _csr(edge_dst, len(node_ids))
+
+    @classmethod
+    def from_dict(cls, kg: Dict[str, Any]) -> "CompactKG":
+        """
+        Build a compact graph from the {"entities", "measurements", "facts"} dict shape.
+        Entity properties dicts are shared, not copied.
+        """
+        entities = kg.get("entities") or {}
+        measurements = kg.get("measurements") or {}
+        facts = kg.get("facts") or []
+
+        node_ids: List[str] = []
+        node_index: Dict[str, int] = {}
+        kinds: List[int] = []
+        group_codes: List[int] = []
+        records: List[Tuple[int, Optional[Dict[str, Any]]]] = []
+        groups = Interner()
+
+        for eid, e in entities.items():
+            node_index[eid] = len(node_ids)
+            node_ids.append(eid)
+            kinds.append(ENTITY)
+            # An entity without a string type gets group -1; its "type" field, if
+            # any, is kept with the record's other fields.
+            entity_type = e.get("type")
+            group_codes.append(groups.intern(entity_type) if isinstance(entity_type, str) else -1)
+            records.append((ENTITY, e))
+
+        for mid, m in measurements.items():
+            node_index[mid] = len(node_ids)
+            node_ids.append(mid)
+            kinds.append(MEASUREMENT)
+            group_codes.append(groups.intern("MEASUREMENT"))
+            records.append((MEASUREMENT, m))
+
+        def node(nid: str) -> int:
+            idx = node_index.get(nid)
+            if idx is None:
+                idx = node_index[nid] = len(node_ids)
+                node_ids.append(nid)
+                kinds.append(DANGLING)
+                group_codes.append(-1)
+                records.append((DANGLING, None))
+            return idx
+
+        predicates = Interner()
+        num_facts = len(facts)
+        edge_src = np.empty(num_facts, dtype=np.int32)
+        edge_pred = np.empty(num_facts, dtype=np.int32)
+        edge_dst = np.empty(num_facts, dtype=np.int32)
+        for i, f in enumerate(facts):
+            edge_src[i] = node(f["subject"])
+            edge_pred[i] = predicates.intern(f["predicate"])
+            edge_dst[i] = node(f["object"])
+
+        return cls(
+            node_ids,
+            np.asarray(kinds, dtype=np.int8),
+            np.asarray(group_codes, dtype=np.int32),
+            groups,
+            NodeRecords.build(records),
+            predicates,
+            edge_src,
+            edge_pred,
+            edge_dst,
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_src)
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_indptr)
+
+    def successors(self, node: int) -> np.ndarray:
+        edges = self.out_edges[self.out_indptr[node]:self.out_indptr[node + 1]]
+        return self.edge_dst[edges]
+
+    def predecessors(self, node: int) -> np.ndarray:
+        edges = self.in_edges[self.in_indptr[node]:self.in_indptr[node + 1]]
+        return self.edge_src[edges]
+
+    def iter_out_facts(self, node: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (subject, predicate, object) index triples for facts leaving `node`.
+        """
+        for e in self.out_edges[self.out_indptr[node]:self.out_indptr[node + 1]]:
+            yield node, int(self.edge_pred[e]), int(self.edge_dst[e])
+
+    def iter_in_facts(self, node: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (subject, predicate, object) index triples for facts entering `node`.
+        """
+        for e in self.in_edges[self.in_indptr[node]:self.in_indptr[node + 1]]:
+            yield int(self.edge_src[e]), int(self.edge_pred[e]), node
+
+    def neighborhood(self, node: int, hops: int = 1) -> np.ndarray:
+        """
+        Indices of nodes within `hops` steps of `node`, ignoring edge direction.
+        """
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        seen[node] = True
+        frontier = np.array([node], dtype=np.int32)
+        for _ in range(hops):
+            if frontier.size == 0:
+                break
+            nxt = np.concatenate(
+                [self.successors(n) for n in frontier] + [self.predecessors(n) for n in frontier]
+            )
+            nxt = np.unique(nxt[~seen[nxt]])
+            seen[nxt] = True
+            frontier = nxt
+        return np.flatnonzero(seen)
+
+    def prune_isolated(self) -> "CompactKG":
+        """
+        Drop entities that take part in no fact and measurements that are not
+        the object of any fact. Dangling ids referenced by facts are kept.
+
+        A measurement that is only ever a subject loses its definition but
+        its facts are kept, so it stays as a dangling id (as the dict-based
+        prune did).
+        """
+        in_deg = self.in_degree()
+        out_deg = self.out_degree()
+        referenced = (in_deg + out_deg) > 0
+        keep = np.where(self.node_kind == MEASUREMENT, in_deg > 0, referenced)
+        keep |= self.node_kind == DANGLING
+        demote = referenced & ~keep
+        if keep.all():
+            return self
+
+        kept = np.flatnonzero(keep | demote)
+        remap = np.full(self.num_nodes, -1, dtype=np.int32)
+        remap[kept] = np.arange(len(kept), dtype=np.int32)
+        node_kind = self.node_kind[kept]
+        node_group = self.node_group[kept]
+        demoted = demote[kept]
+        node_kind[demoted] = DANGLING
+        node_group[demoted] = -1
+        return CompactKG(
+            [self.node_ids[i] for i in kept],
+            node_kind,
+            node_group,
+            self.groups,
+            self.records.take(kept, demoted),
+            self.predicates,
+            remap[self.edge_src],
+            self.edge_pred,
+            remap[self.edge_dst],
+        )
+
+    def record(self, node: int) -> Optional[Dict[str, Any]]:
+        """
+        The entity or measurement record of a node as a dict, or None for a dangling id.
+        """
+        kind = self.node_kind[node]
+        if kind == ENTITY:
+            group = self.node_group[node]
+            return self.records.entity(node, self.groups[group] if group >= 0 else None)
+        if kind == MEASUREMENT:
+            return self.records.measurement(node)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert back to the {"entities", "measurements", "facts"} dict shape.
+        Records are rebuilt from the columns; every entity has "properties".
+        """
+        entities = {}
+        measurements = {}
+        for i, (nid, kind) in enumerate(zip(self.node_ids, self.node_kind.tolist())):
+            if kind == ENTITY:
+                entities[nid] = self.record(i)
+            elif kind == MEASUREMENT:
+                measurements[nid] = self.record(i)
+
+        node_ids = self.node_ids
+        predicates = self.predicates
+        facts = [
+            {"subject": node_ids[s], "predicate": predicates[p], "object": node_ids[o]}
+            for s, p, o in zip(self.edge_src.tolist(), self.edge_pred.tolist(), self.edge_dst.tolist())
+        ]
+        return {"entities": entities, "measurements": measurements, "facts": facts}
+
+    def to_networkx(self):
+        """
+        Build a networkx DiGraph with the same node order, for algorithms not
+        implemented on the compact form.
+        """
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(self.node_ids)
+        node_ids = self.node_ids
+        G.add_edges_from(
+            (node_ids[s], node_ids[o], {"predicate": self.predicates[p]})
+            for s, p, o in zip(self.edge_src.tolist(), self.edge_pred.tolist(), self.edge_dst.tolist())
+        )
+        return G
+
+    def spring_layout(
+        self,
+        k: Optional[float] = None,
+        iterations: int = 50,
+        threshold: float = 1e-4,
+        seed: Optional[int] = None,
+        block_size: int = 512,
+    ) -> np.ndarray:
+        """
+        Fruchterman-Reingold layout computed on the compact graph.
+
+        Follows networkx's dense spring_layout for a DiGraph (same seeding,
+        cooling and rescaling, attraction along out-edges only), but takes the
+        attractive forces from the edge arrays and computes repulsion in row
+        blocks, so memory stays O(block_size * n) on large graphs.
+
+        Returns:
+            (num_nodes, 2) array of positions scaled to [-1, 1], in node order
+        """
+        n = self.num_nodes
+        if n == 0:
+            return np.zeros((0, 2))
+        if n == 1:
+            return np.zeros((1, 2))
+
+        pos = np.random.RandomState(seed).rand(n, 2)
+        if k is None:
+            k = np.sqrt(1.0 / n)
+
+        # A DiGraph collapses repeated (subject, object) pairs into one edge,
+        # and self loops exert no force.
+        pairs = np.unique(np.stack([self.edge_src, self.edge_dst], axis=1), axis=0)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        src, dst = pairs[:, 0], pairs[:, 1]
+
+        t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1
+        dt = t / (iterations + 1)
+        displacement = np.empty_like(pos)
+
+        for _ in range(iterations):
+            # Repulsion between all pairs.
+            x, y = pos[:, 0], pos[:, 1]
+            for start in range(0, n, block_size):
+                stop = min(start + block_size, n)
+                dx = x[start:stop, np.newaxis] - x
+                dy = y[start:stop, np.newaxis] - y
+                dist_sq = dx * dx + dy * dy
+                np.maximum(dist_sq, 0.0001, out=dist_sq)  # minimum distance of 0.01
+                force = np.divide(k * k, dist_sq, out=dist_sq)
+                displacement[start:stop, 0] = (dx * force).sum(axis=1)
+                displacement[start:stop, 1] = (dy * force).sum(axis=1)
+
+            # Attraction along edges.
+            delta = pos[src] - pos[dst]
+            distance = np.clip(np.linalg.norm(delta, axis=-1), 0.01, None)
+            np.add.at(displacement, src, -delta * (distance / k)[:, np.newaxis])
+
+            length = np.clip(np.linalg.norm(displacement, axis=-1), 0.01, None)
+            delta_pos = displacement * (t / length)[:, np.newaxis]
+            pos += delta_pos
+            t -= dt
+            if (np.linalg.norm(delta_pos) / n) < threshold:
+                break
+
+        pos -= pos.mean(axis=0)
+        lim = np.abs(pos).max()
+        if lim > 0:
+            pos *= 1.0 / lim
+        return pos
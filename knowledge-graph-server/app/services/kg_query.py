@@ -1,17 +1,22 @@
+import logging
+from contextlib import closing
+from typing import Dict, Iterator, List, Tuple
 from app.core.llm import get_llm
-from app.core.config import settings
+from app.core.model_router import QUERY, chat_completion, chat_completion_stream, stage_model
 from app.storage.cache import load_last_kg, get_conversation_history, save_conversation_history
 
-def query_knowledge_graph(query: str) -> str:
+logger = logging.getLogger(__name__)
+
+def _build_query_messages(query: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
     """
-    Answer a natural language question about the knowledge graph using LLM.
+    Build the chat messages for answering a query.
     
     Args:
         query: The user's question
-        factual_triples: Optional factual triples string for additional context
         
     Returns:
-        The answer as a string
+        (messages, conversation_history) where conversation_history is the history the
+        answer should be appended to
     """
     client = get_llm()
     if client is None:
@@ -59,9 +64,32 @@ def query_knowledge_graph(query: str) -> str:
 
     messages.append({"role": "user", "content": query})
 
+    return messages, conversation_history
+
+
+def _append_to_history(conversation_history: List[Dict[str, str]], query: str, answer: str) -> None:
+    conversation_history.append({"role": "user", "content": query})
+    conversation_history.append({"role": "assistant", "content": answer})
+    save_conversation_history(conversation_history)
+    logger.debug("Conversation history has %d messages", len(conversation_history))
+
+
+def query_knowledge_graph(query: str) -> str:
+    """
+    Answer a natural language question about the knowledge graph using LLM.
+    
+    Args:
+        query: The user's question
+        
+    Returns:
+        The answer as a string
+    """
+    messages, conversation_history = _build_query_messages(query)
+
     # Make API call to LLM
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    response = chat_completion(
+        QUERY,
+        stage_model(QUERY),
         messages=messages,
         temperature=0.3  # Lower temperature for more consistent answers
     )
@@ -69,10 +97,38 @@ def query_knowledge_graph(query: str) -> str:
     # Extract and return the answer
     answer = response.choices[0].message.content
 
-    conversation_history.append({"role": "user", "content": query})
-    conversation_history.append({"role": "assistant", "content": answer})
-    save_conversation_history(conversation_history)
-    print(conversation_history)
+    _append_to_history(conversation_history, query, answer)
 
     return answer
 
+
+def stream_query_knowledge_graph(query: str) -> Iterator[str]:
+    """
+    Answer a natural language question about the knowledge graph, yielding the
+    answer's tokens as the LLM produces them.
+    
+    The full answer is appended to the conversation history once the stream
+    completes. Closing the generator early cancels the upstream completion and
+    leaves the history unchanged.
+    
+    Args:
+        query: The user's question
+        
+    Yields:
+        Answer text deltas
+    """
+    messages, conversation_history = _build_query_messages(query)
+
+    answer_parts = []
+    with closing(chat_completion_stream(
+        QUERY,
+        stage_model(QUERY),
+        messages=messages,
+        temperature=0.3  # Lower temperature for more consistent answers
+    )) as tokens:
+        for token in tokens:
+            answer_parts.append(token)
+            yield token
+
+    _append_to_history(conversation_history, query, "".join(answer_parts))
+
@@ -0,0 +1,422 @@
+import contextvars
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.model_router import uses_long_context_model
+from app.core.profiling import profiled
+from app.services.doc_reducer import reduce_paragraphs
+from app.services.kg_extractor import extract_knowledge_graph, extract_factual_triplets
+from app.services.kg_visual_builder import build_visual_graph
+
+_PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n")
+# Paragraph tag at the start of a triple line, e.g. "[P2] (Subject, PREDICATE, Object)".
+_TRIPLE_TAG_RE = re.compile(r"^\s*\[P(\d+)\]\s*")
+_REDUCTION_COUNTERS = ("original_tokens", "reduced_tokens", "tokens_saved", "sentences_total", "sentences_kept")
+
+
+def _paragraph_id(text: str) -> str:
+    # Whitespace-insensitive, so re-wrapping a paragraph does not count as a change.
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def split_paragraphs(text: str) -> List[Dict[str, str]]:
+    """
+    Split a document into paragraphs on blank lines.
+
+    Paragraphs longer than `revision_block_chars` (including text without any
+    blank lines) are split further by line, so that one edit does not
+    invalidate the whole document.
+
+    Returns:
+        List of {"id": content hash, "text": paragraph text}, in document order
+    """
+    paragraphs = []
+    for chunk in _PARAGRAPH_BREAK_RE.split(text.replace("\r\n", "\n")):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        parts = chunk.split("\n") if len(chunk) > settings.revision_block_chars else [chunk]
+        for part in parts:
+            part = part.strip()
+            if part:
+                paragraphs.append({"id": _paragraph_id(part), "text": part})
+    return paragraphs
+
+
+def _block_chars(document_chars: int) -> int:
+    """
+    Largest block of a document extracted in one call. A document routed to
+    the long-context model is not split, since that model takes it whole.
+    """
+    if uses_long_context_model(document_chars):
+        return max(document_chars, settings.revision_block_chars)
+    return settings.revision_block_chars
+
+
+def _chunk_run(paragraphs: List[Dict[str, str]], block_chars: int) -> List[List[Dict[str, str]]]:
+    """
+    Group consecutive paragraphs into blocks of at most `block_chars`.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in paragraphs:
+        if current and size + len(paragraph["text"]) > block_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph["text"]) + 2
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _block_id(paragraph_ids: List[str]) -> str:
+    return hashlib.sha1("".join(paragraph_ids).encode("ascii")).hexdigest()[:16]
+
+
+def _triple_lines(block: Dict[str, Any]) -> List[Tuple[Optional[str], str]]:
+    """
+    (paragraph id or None, triple) for each triple of a block.
+    """
+    lines = [line for line in block["triples"].split("\n") if line.strip()]
+    paragraphs = block.get("triple_paragraphs") or [None] * len(lines)
+    return list(zip(paragraphs, lines))
+
+
+def _trimmable(block: Dict[str, Any]) -> bool:
+    # Blocks saved before paragraph tags, or whose extraction did not tag
+    # every fact and triple, can only be reused or retracted whole.
+    facts = block["kg"].get("facts") or []
+    lines = _triple_lines(block)
+    return all(f.get("paragraph") for f in facts) and all(pid for pid, _ in lines)
+
+
+def _trim_block(block: Dict[str, Any], paragraph_ids: List[str]) -> Dict[str, Any]:
+    """
+    Keep the part of a block extracted from `paragraph_ids`: their facts and
+    triples, and the entities and measurements those facts reference.
+    """
+    keep = set(paragraph_ids)
+    kg = block["kg"]
+    facts = [f for f in kg.get("facts") or [] if f["paragraph"] in keep]
+    referenced = {f["subject"] for f in facts} | {f["object"] for f in facts}
+    lines = [(pid, line) for pid, line in _triple_lines(block) if pid in keep]
+    return {
+        "id": _block_id(paragraph_ids),
+        "paragraphs": paragraph_ids,
+        "kg": {
+            "entities": {k: v for k, v in (kg.get("entities") or {}).items() if k in referenced},
+            "measurements": {k: v for k, v in (kg.get("measurements") or {}).items() if k in referenced},
+            "facts": facts,
+        },
+        "triples": "\n".join(line for _, line in lines),
+        "triple_paragraphs": [pid for pid, _ in lines],
+    }
+
+
+def _plan_blocks(
+    paragraphs: List[Dict[str, str]],
+    previous_blocks: List[Dict[str, Any]],
+    block_chars: int
+) -> Tuple[List[Tuple[str, Any]], List[Dict[str, Any]]]:
+    """
+    Diff the new paragraphs against the previous blocks.
+
+    A previous block whose paragraphs are all still present is reused. One
+    that lost some paragraphs is trimmed to the facts and triples of the
+    paragraphs still present, when its extraction tagged every fact and
+    triple with its paragraph; otherwise it is retracted as a whole. Every
+    new paragraph not covered by a reused or trimmed block is extracted, in
+    blocks of at most `block_chars` of consecutive paragraphs.
+
+    Returns:
+        (steps, retracted): steps are ("reuse", block), ("trim", (trimmed,
+        block)) and ("extract", [paragraphs]) in document order; retracted
+        are the previous blocks dropped entirely
+    """
+    position: Dict[str, int] = {}
+    for i, paragraph in enumerate(paragraphs):
+        position.setdefault(paragraph["id"], i)
+
+    steps: List[Tuple[int, str, Any]] = []
+    retracted: List[Dict[str, Any]] = []
+    covered = set()
+    for block in previous_blocks:
+        present = [pid for pid in block["paragraphs"] if pid in position]
+        if present and len(present) == len(block["paragraphs"]):
+            steps.append((min(position[pid] for pid in present), "reuse", block))
+        elif present and _trimmable(block):
+            steps.append((min(position[pid] for pid in present), "trim", (_trim_block(block, present), block)))
+        else:
+            retracted.append(block)
+            continue
+        covered.update(present)
+
+    run: List[Dict[str, str]] = []
+    run_start = 0
+    for i, paragraph in enumerate(paragraphs + [None]):
+        if paragraph is not None and paragraph["id"] not in covered:
+            if not run:
+                run_start = i
+            run.append(paragraph)
+            continue
+        for chunk in _chunk_run(run, block_chars):
+            steps.append((run_start, "extract", chunk))
+            run_start += len(chunk)
+        run = []
+
+    steps.sort(key=lambda step: step[0])
+    return [(kind, item) for _, kind, item in steps], retracted
+
+
+@profiled
+def _extract_block(
+    paragraphs: List[Dict[str, str]],
+    keep_ratio: Optional[float],
+    document_chars: int
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Extract the KG and triples of one block of paragraphs.
+
+    Paragraphs are sent tagged [P1], [P2], … so that every fact and triple
+    names the paragraph it was extracted from; the tags are stored as
+    paragraph IDs. The extraction model is routed on `document_chars`.
+
+    Returns:
+        (block, reduction): the stored block and its document reduction stats
+    """
+    texts = [p["text"] for p in paragraphs]
+    reduction = None
+    if settings.doc_reduction_enabled:
+        reduction = reduce_paragraphs(texts, keep_ratio, document_chars)
+        texts = reduction.pop("paragraphs")
+
+    tags: Dict[str, str] = {}
+    parts = []
+    for paragraph, text in zip(paragraphs, texts):
+        if text.strip():
+            tag = f"P{len(tags) + 1}"
+            tags[tag] = paragraph["id"]
+            parts.append(f"[{tag}] {text}")
+
+    # Routed on the whole document's size, not the block's.
+    kg = extract_knowledge_graph("\n\n".join(parts), document_chars) if parts else {"entities": {}, "measurements": {}, "facts": []}
+    triples = extract_factual_triplets(kg) if kg.get("facts") else ""
+
+    for fact in kg.get("facts") or []:
+        pid = tags.get(str(fact.pop("paragraph", "") or "").strip("[] "))
+        if pid is not None:
+            fact["paragraph"] = pid
+
+    lines, line_paragraphs = [], []
+    for line in (triples or "").splitlines():
+        match = _TRIPLE_TAG_RE.match(line)
+        if match:
+            line = line[match.end():]
+        if line.strip():
+            lines.append(line.strip())
+            line_paragraphs.append(tags.get(f"P{match.group(1)}") if match else None)
+
+    paragraph_ids = [p["id"] for p in paragraphs]
+    block = {
+        "id": _block_id(paragraph_ids),
+        "paragraphs": paragraph_ids,
+        "kg": kg,
+        "triples": "\n".join(lines),
+        "triple_paragraphs": line_paragraphs,
+    }
+    return block, reduction
+
+
+def merge_blocks(blocks: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Merge per-block knowledge graphs into one, renumbering IDs.
+
+    Entities with the same name (case-insensitive) and type are merged, and
+    identical facts are kept once. Facts referencing an ID their block does
+    not define are dropped.
+
+    Returns:
+        (kg, provenance): provenance maps every fact (by index) and
+        measurement (by ID) to the IDs of the paragraphs it was extracted
+        from: the fact's own paragraph, or the whole block for facts without one
+    """
+    entities: Dict[str, Any] = {}
+    measurements: Dict[str, Any] = {}
+    facts: List[Dict[str, str]] = []
+    entity_ids: Dict[tuple, str] = {}
+    fact_index: Dict[tuple, int] = {}
+    fact_sources: List[List[str]] = []
+    measurement_sources: Dict[str, List[str]] = {}
+
+    for block in blocks:
+        kg = block["kg"]
+
+        # Paragraphs of the facts referencing each local ID.
+        local_sources: Dict[str, List[str]] = {}
+        for fact in kg.get("facts") or []:
+            sources = [fact["paragraph"]] if fact.get("paragraph") else block["paragraphs"]
+            for role in ("subject", "object"):
+                known = local_sources.setdefault(fact.get(role), [])
+                known.extend(p for p in sources if p not in known)
+
+        remap: Dict[str, str] = {}
+        for local_id, entity in (kg.get("entities") or {}).items():
+            key = (str(entity.get("name", "")).strip().casefold(), entity.get("type"))
+            eid = entity_ids.get(key)
+            if eid is None:
+                eid = entity_ids[key] = f"E{len(entities) + 1}"
+                entities[eid] = dict(entity, properties=dict(entity.get("properties") or {}))
+            else:
+                for name, value in (entity.get("properties") or {}).items():
+                    entities[eid]["properties"].setdefault(name, value)
+            remap[local_id] = eid
+
+        for local_id, measurement in (kg.get("measurements") or {}).items():
+            mid = f"M{len(measurements) + 1}"
+            measurements[mid] = measurement
+            measurement_sources[mid] = list(local_sources.get(local_id) or block["paragraphs"])
+            remap[local_id] = mid
+
+        for fact in kg.get("facts") or []:
+            subject, obj = remap.get(fact.get("subject")), remap.get(fact.get("object"))
+            if subject is None or obj is None:
+                continue
+            sources = [fact["paragraph"]] if fact.get("paragraph") else block["paragraphs"]
+            key = (subject, fact.get("predicate"), obj)
+            idx = fact_index.get(key)
+            if idx is None:
+                fact_index[key] = len(facts)
+                facts.append({"subject": subject, "predicate": fact.get("predicate"), "object": obj})
+                fact_sources.append(list(sources))
+            else:
+                fact_sources[idx].extend(p for p in sources if p not in fact_sources[idx])
+
+    kg = {"entities": entities, "measurements": measurements, "facts": facts}
+    return kg, {"facts": fact_sources, "measurements": measurement_sources}
+
+
+def _kg_size(block: Dict[str, Any]) -> Tuple[int, int]:
+    kg = block["kg"]
+    return len(kg.get("facts") or []), len(kg.get("measurements") or {})
+
+
+def build_knowledge_graph(
+    text: str,
+    keep_ratio: Optional[float] = None,
+    previous_source: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the knowledge graph of a document block by block, reusing what was
+    extracted from the unchanged paragraphs of a previous version of it.
+
+    The document is split into paragraphs and diffed against
+    `previous_source`. Only new or changed paragraphs are sent to the LLM
+    (extraction and triplets); facts, measurements and triples extracted from
+    removed or changed paragraphs are retracted. Without a previous source
+    every block is extracted.
+
+    Args:
+        text: Document text
+        keep_ratio: Document reduction keep ratio for extracted blocks
+        previous_source: The 'source' saved with the previous version's KG
+
+    Returns:
+        Dictionary with 'kg', 'visual_graph_nodes', 'factual_triples',
+        'reduction', 'revision' (reuse and retraction counts) and 'source'
+        (blocks and provenance, to be saved with the KG)
+    """
+    paragraphs = split_paragraphs(text)
+    previous_blocks = (previous_source or {}).get("blocks") or []
+    plan, retracted = _plan_blocks(paragraphs, previous_blocks, _block_chars(len(text)))
+
+    to_extract = [chunk for step, chunk in plan if step == "extract"]
+    extracted = []
+    if to_extract:
+        workers = max(1, min(settings.revision_block_concurrency, len(to_extract)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kg-block") as pool:
+            # Each task runs in a copy of the request context (e.g. the active profile).
+            futures = [
+                pool.submit(contextvars.copy_context().run, _extract_block, chunk, keep_ratio, len(text))
+                for chunk in to_extract
+            ]
+            extracted = [future.result() for future in futures]
+
+    blocks = []
+    new_blocks = iter(extracted)
+    for step, item in plan:
+        if step == "reuse":
+            blocks.append(item)
+        elif step == "trim":
+            blocks.append(item[0])
+        else:
+            blocks.append(next(new_blocks)[0])
+
+    reduction = None
+    if settings.doc_reduction_enabled:
+        reduction = {name: sum(r[name] for _, r in extracted) for name in _REDUCTION_COUNTERS}
+
+    # What trimmed blocks lost counts as retracted too.
+    dropped = [_kg_size(block) for block in retracted]
+    for step, item in plan:
+        if step == "trim":
+            (kept_facts, kept_measurements), (facts, measurements) = _kg_size(item[0]), _kg_size(item[1])
+            dropped.append((facts - kept_facts, measurements - kept_measurements))
+
+    paragraphs_extracted = sum(len(chunk) for chunk in to_extract)
+    revision = {
+        "paragraphs": len(paragraphs),
+        "paragraphs_reused": len(paragraphs) - paragraphs_extracted,
+        "paragraphs_extracted": paragraphs_extracted,
+        "blocks_reused": sum(1 for step, _ in plan if step == "reuse"),
+        "blocks_trimmed": sum(1 for step, _ in plan if step == "trim"),
+        "blocks_extracted": len(extracted),
+        "blocks_retracted": len(retracted),
+        "facts_retracted": sum(facts for facts, _ in dropped),
+        "measurements_retracted": sum(measurements for _, measurements in dropped),
+    }
+
+    result = _assemble(blocks, [p["id"] for p in paragraphs])
+    result.update(reduction=reduction, revision=revision)
+    return result
+
+
+def _assemble(blocks: List[Dict[str, Any]], paragraph_ids: List[str]) -> Dict[str, Any]:
+    kg, provenance = merge_blocks(blocks)
+    return {
+        "kg": kg,
+        "visual_graph_nodes": build_visual_graph(kg),
+        "factual_triples": "\n".join(block["triples"].strip() for block in blocks if block["triples"].strip()),
+        "source": {
+            "paragraphs": paragraph_ids,
+            "blocks": blocks,
+            "provenance": provenance,
+        },
+    }
+
+
+def knowledge_graph_from_source(source: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild a saved document's knowledge graph from its source, without any
+    LLM calls.
+
+    Returns:
+        Same shape as `build_knowledge_graph`, with every block reused
+    """
+    blocks = source.get("blocks") or []
+    result = _assemble(blocks, source.get("paragraphs") or [])
+    paragraphs = sum(len(block["paragraphs"]) for block in blocks)
+    result.update(reduction=None, revision={
+        "paragraphs": paragraphs,
+        "paragraphs_reused": paragraphs,
+        "paragraphs_extracted": 0,
+        "blocks_reused": len(blocks),
+        "blocks_trimmed": 0,
+        "blocks_extracted": 0,
+        "blocks_retracted": 0,
+        "facts_retracted": 0,
+        "measurements_retracted": 0,
+    })
+    return result
@@ -0,0 +1,57 @@
+from typing import Any, List
+from app.domain.entity_types import ALLOWED_ENTITY_TYPES
+from app.domain.metric_types import ALLOWED_METRIC_TYPES
+from app.domain.predicate_types import ALLOWED_PREDICATE_TYPES
+
+# The extraction prompt requires HAS_MEASUREMENT to link entities to measurements.
+_VALID_PREDICATES = set(ALLOWED_PREDICATE_TYPES) | {"HAS_MEASUREMENT"}
+_VALID_ENTITY_TYPES = set(ALLOWED_ENTITY_TYPES)
+_VALID_METRIC_TYPES = set(ALLOWED_METRIC_TYPES)
+
+
+def validate_kg(kg: Any) -> List[str]:
+    """
+    Check an extracted knowledge graph against the schema and ontology.
+
+    Args:
+        kg: Parsed LLM output
+
+    Returns:
+        List of validation errors, empty if the knowledge graph is valid
+    """
+    if not isinstance(kg, dict):
+        return ["Knowledge graph is not a JSON object"]
+
+    errors = []
+    for key, expected in (("entities", dict), ("measurements", dict), ("facts", list)):
+        if not isinstance(kg.get(key), expected):
+            errors.append(f"Missing or invalid top-level key '{key}'")
+    if errors:
+        return errors
+
+    for eid, e in kg["entities"].items():
+        if not isinstance(e, dict) or "name" not in e:
+            errors.append(f"Entity {eid} is missing a name")
+        elif e.get("type") not in _VALID_ENTITY_TYPES:
+            errors.append(f"Entity {eid} has unknown type {e.get('type')!r}")
+
+    for mid, m in kg["measurements"].items():
+        if not isinstance(m, dict) or not all(k in m for k in ("metric", "value", "unit")):
+            errors.append(f"Measurement {mid} is missing metric, value or unit")
+        elif m["metric"] not in _VALID_METRIC_TYPES:
+            errors.append(f"Measurement {mid} has unknown metric {m['metric']!r}")
+        elif not isinstance(m["value"], (int, float)) or isinstance(m["value"], bool):
+            errors.append(f"Measurement {mid} value is not a number")
+
+    known_ids = kg["entities"].keys() | kg["measurements"].keys()
+    for i, f in enumerate(kg["facts"]):
+        if not isinstance(f, dict) or not all(k in f for k in ("subject", "predicate", "object")):
+            errors.append(f"Fact {i} is not a (subject, predicate, object) triplet")
+            continue
+        if f["predicate"] not in _VALID_PREDICATES:
+            errors.append(f"Fact {i} uses unknown predicate {f['predicate']!r}")
+        for role in ("subject", "object"):
+            if not isinstance(f[role], str) or f[role] not in known_ids:
+                errors.append(f"Fact {i} {role} {f[role]!r} is not a defined entity or measurement")
+
+    return errors
@@ -1,41 +1,38 @@
-import networkx as nx
 import json
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Union
 
+if TYPE_CHECKING:
+    from app.services.kg_graph import CompactKG
 
-def build_visual_graph(extracted_kg: Dict[str, Any]) -> str:
+
+def build_visual_graph(extracted_kg: Union[Dict[str, Any], "CompactKG"]) -> str:
     """
-    Build a visual representation of the knowledge graph using NetworkX.
+    Build a visual representation of the knowledge graph.
     
     Args:
-        extracted_kg: Dictionary containing entities, measurements, and facts
+        extracted_kg: Dictionary containing entities, measurements, and facts, or a CompactKG
         
     Returns:
         JSON string containing node dictionaries with positions and styling for visualization
     """
-    # Create NetworkX graph
-    G = nx.DiGraph()
-    
-    # Add all nodes to NetworkX graph
-    for eid, e in extracted_kg["entities"].items():
-        G.add_node(eid)
-    
-    for mid, m in extracted_kg["measurements"].items():
-        G.add_node(mid)
-    
-    # Add all edges to NetworkX graph
-    for f in extracted_kg["facts"]:
-        G.add_edge(f["subject"], f["object"])
+    # numpy-backed, imported on first use to keep worker start-up fast;
+    # startup warm-up imports it in the background.
+    from app.services.kg_graph import CompactKG, ENTITY, MEASUREMENT
+
+    graph = extracted_kg if isinstance(extracted_kg, CompactKG) else CompactKG.from_dict(extracted_kg)
     
     # Calculate positions
-    pos = nx.spring_layout(G, k=2.0, iterations=100, seed=42)
+    pos = graph.spring_layout(k=2.0, iterations=100, seed=42).tolist()
     
     # Convert to node format similar to HTML output
     networkx_nodes = []
+    entity_nodes = [i for i, kind in enumerate(graph.node_kind) if kind == ENTITY]
+    measurement_nodes = [i for i, kind in enumerate(graph.node_kind) if kind == MEASUREMENT]
     
     # Add entities
-    for eid, e in extracted_kg["entities"].items():
-        x, y = pos[eid]
+    for i in entity_nodes:
+        eid, e = graph.node_ids[i], graph.record(i)
+        x, y = pos[i]
         node = {
             "id": eid,
             "label": e["name"],
@@ -51,8 +48,9 @@ def build_visual_graph(extracted_kg: Dict[str, Any]) -> str:
         networkx_nodes.append(node)
     
     # Add measurements
-    for mid, m in extracted_kg["measurements"].items():
-        x, y = pos[mid]
+    for i in measurement_nodes:
+        mid, m = graph.node_ids[i], graph.record(i)
+        x, y = pos[i]
         node = {
             "id": mid,
             "label": f'{m["metric"]}: {m["value"]} {m["unit"]}',
@@ -70,12 +68,12 @@ def build_visual_graph(extracted_kg: Dict[str, Any]) -> str:
     networkx_edges = []
 
     # Add edges
-    for f in extracted_kg["facts"]:
+    for s, p, o in zip(graph.edge_src.tolist(), graph.edge_pred.tolist(), graph.edge_dst.tolist()):
         edge = {
             "arrows": "to",
-            "from": f["subject"],
-            "to": f["object"],
-            "label": f["predicate"],
+            "from": graph.node_ids[s],
+            "to": graph.node_ids[o],
+            "label": graph.predicates[p],
             "font": {"size": 32},
             "smooth": False
         }
@@ -0,0 +1,368 @@
+import hashlib
+import re
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+
+# numpy is imported inside functions: this module is imported by the routes,
+# and numpy is deferred from import time (see core/startup.py).
+
+_SIGNATURE_DIR = Path(__file__).resolve().parent.parent / "storage" / "minhash"
+
+_WORD_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = 0xFFFFFFFF
+_SHINGLE_BASE = 1000003
+_BAND_BASE = 0x100000001B3
+_SHINGLE_CHUNK = 8192
+# Batches at least this large (e.g. loading the index file) skip the pending dicts.
+_BULK_ROWS = 1024
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> int:
+    """
+    Pick the number of LSH bands (bands * rows == num_perm) whose candidate
+    threshold (1/bands) ** (1/rows) is the highest one not above `threshold`,
+    so that pairs at the threshold are found with high probability and
+    candidates are then verified on the full signature.
+    """
+    best_bands, best_threshold = num_perm, 0.0
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        candidate_threshold = (1.0 / bands) ** (1.0 / rows)
+        if best_threshold < candidate_threshold <= threshold:
+            best_bands, best_threshold = bands, candidate_threshold
+    return best_bands
+
+
+def document_id(text: str) -> str:
+    """
+    Content id of a document (truncated SHA-256 of the text).
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+@lru_cache(maxsize=4)
+def _permutations(num_perm: int):
+    # Fixed seed: signatures are persisted and compared across processes.
+    import numpy as np
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def minhash_signature(text: str, num_perm: Optional[int] = None):
+    """
+    MinHash signature of the document's word shingles.
+
+    Words are lower-cased; shingles are `near_duplicate_shingle_words`
+    consecutive words, hashed to 32 bits. Each of the `num_perm` hash
+    functions is (a * x + b) mod (2^61 - 1), truncated to 32 bits.
+
+    Returns:
+        uint32 array of length num_perm, or None if the text has no words
+    """
+    import numpy as np
+
+    num_perm = num_perm or settings.near_duplicate_num_perm
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words)
+    )
+    k = min(settings.near_duplicate_shingle_words, len(words))
+    count = len(words) - k + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for j in range(k):
+        shingles = shingles * np.uint64(_SHINGLE_BASE) + word_hashes[j:j + count]
+    shingles = np.unique(shingles & np.uint64(_MAX_HASH))
+
+    a, b = _permutations(num_perm)
+    prime = np.uint64(_MERSENNE_PRIME)
+    signature = np.full(num_perm, _MAX_HASH, dtype=np.uint64)
+    # a and x are below 2^32, so a * x fits in 64 bits.
+    for start in range(0, len(shingles), _SHINGLE_CHUNK):
+        chunk = shingles[None, start:start + _SHINGLE_CHUNK]
+        values = ((a * chunk) % prime + b) % prime & np.uint64(_MAX_HASH)
+        np.minimum(signature, values.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+class MinHashLSHIndex:
+    """
+    LSH index over MinHash signatures, backed by an append-only file.
+
+    Each band of `rows` signature values is hashed to a 64-bit key. Keys are
+    kept per band in sorted NumPy arrays (searched with `searchsorted`) plus
+    a small dict of recent inserts that is merged in once it grows past a
+    fraction of the index, so inserts stay amortised O(log n) and memory is
+    about 4 * num_perm + 12 * bands bytes per document.
+
+    Signatures are appended to a file shared by all worker processes; every
+    lookup first reads records appended since the last one, so a document
+    ingested by one worker is seen by the others.
+    """
+
+    def __init__(self, path: Path, num_perm: int, bands: int):
+        import numpy as np
+
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._record = np.dtype([("doc", "u1", (16,)), ("sig", "<u4", (num_perm,))])
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._count = 0
+        self._docs = np.empty((0, 16), dtype=np.uint8)
+        self._sigs = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self._band_rows = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self._pending: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._pending_count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _keys(self, signatures):
+        """
+        Band keys for an (n, num_perm) signature array, shape (n, bands).
+        """
+        import numpy as np
+
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        # In slices, to bound the uint64 temporaries when loading a large index.
+        for start in range(0, len(signatures), 65536):
+            banded = signatures[start:start + 65536].reshape(-1, self.bands, self.rows)
+            slice_keys = keys[start:start + 65536]
+            for j in range(self.rows):
+                slice_keys *= np.uint64(_BAND_BASE)
+                slice_keys += banded[:, :, j]
+        return keys
+
+    def _append_rows(self, docs, signatures) -> None:
+        import numpy as np
+
+        start = self._count
+        needed = start + len(signatures)
+        if needed > len(self._sigs):
+            capacity = max(needed, 2 * len(self._sigs), 1024)
+            sigs = np.empty((capacity, self.num_perm), dtype=np.uint32)
+            sigs[:start] = self._sigs[:start]
+            doc_ids = np.empty((capacity, 16), dtype=np.uint8)
+            doc_ids[:start] = self._docs[:start]
+            self._sigs, self._docs = sigs, doc_ids
+        self._sigs[start:needed] = signatures
+        self._docs[start:needed] = docs
+        self._count = needed
+
+        keys = self._keys(signatures)
+        if len(signatures) >= _BULK_ROWS:
+            rows = np.arange(start, needed, dtype=np.int64)
+            for band in range(self.bands):
+                self._merge(band, keys[:, band], rows)
+            return
+
+        for band in range(self.bands):
+            pending = self._pending[band]
+            for i, key in enumerate(keys[:, band].tolist()):
+                pending.setdefault(key, []).append(start + i)
+        self._pending_count += len(signatures)
+        if self._pending_count > max(_BULK_ROWS, self._count // 16):
+            self._compact()
+
+    def _merge(self, band: int, new_keys, new_rows) -> None:
+        import numpy as np
+
+        keys = np.concatenate([self._band_keys[band], new_keys])
+        rows = np.concatenate([self._band_rows[band], new_rows])
+        order = np.argsort(keys)
+        self._band_keys[band], self._band_rows[band] = keys[order], rows[order]
+
+    def _compact(self) -> None:
+        import numpy as np
+
+        for band in range(self.bands):
+            pending = self._pending[band]
+            new_keys = np.fromiter(
+                (key for key, rows in pending.items() for _ in rows), dtype=np.uint64, count=self._pending_count
+            )
+            new_rows = np.fromiter(
+                (row for rows in pending.values() for row in rows), dtype=np.int64, count=self._pending_count
+            )
+            self._merge(band, new_keys, new_rows)
+            self._pending[band] = {}
+        self._pending_count = 0
+
+    def _sync(self) -> None:
+        import numpy as np
+
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        # Only whole records: another worker may be mid-append.
+        count = (size - self._offset) // self._record.itemsize
+        if count <= 0:
+            return
+        records = np.fromfile(self.path, dtype=self._record, count=count, offset=self._offset)
+        self._offset += count * self._record.itemsize
+        self._append_rows(records["doc"], records["sig"])
+
+    def load(self) -> None:
+        """
+        Read signatures appended to the index file since the last read.
+        """
+        with self._lock:
+            self._sync()
+
+    def add(self, doc_id: str, signature) -> None:
+        """
+        Append a document's signature to the index file and the index.
+        """
+        import numpy as np
+
+        record = np.zeros(1, dtype=self._record)
+        record["doc"] = np.frombuffer(bytes.fromhex(doc_id)[:16], dtype=np.uint8)
+        record["sig"] = signature
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(record.tobytes())
+            self._sync()
+
+    def query(self, signature, threshold: float) -> List[Tuple[str, float]]:
+        """
+        Find stored documents whose estimated Jaccard similarity to
+        `signature` is at least `threshold`.
+
+        Returns:
+            List of (doc_id, similarity), most similar first
+        """
+        import numpy as np
+
+        with self._lock:
+            self._sync()
+            keys = self._keys(signature[None, :])[0].tolist()
+            candidates = set()
+            for band, key in enumerate(keys):
+                band_keys = self._band_keys[band]
+                lo = np.searchsorted(band_keys, np.uint64(key), side="left")
+                hi = np.searchsorted(band_keys, np.uint64(key), side="right")
+                candidates.update(self._band_rows[band][lo:hi].tolist())
+                candidates.update(self._pending[band].get(key, ()))
+            if not candidates:
+                return []
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self._sigs[rows] == signature).mean(axis=1)
+            docs = self._docs[rows]
+
+        matches = {}
+        for doc, score in zip(docs, similarity.tolist()):
+            if score >= threshold:
+                doc_id = doc.tobytes().hex()
+                matches[doc_id] = max(score, matches.get(doc_id, 0.0))
+        return sorted(matches.items(), key=lambda item: item[1], reverse=True)
+
+
+_INDEX: Optional[MinHashLSHIndex] = None
+_INDEX_LOCK = threading.Lock()
+_STATS_LOCK = threading.Lock()
+_STATS = {"checked": 0, "exact": 0, "flagged": 0, "skipped": 0, "delta": 0}
+
+
+def get_index() -> MinHashLSHIndex:
+    """
+    Get the process-wide LSH index, loading stored signatures on first use.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            num_perm = settings.near_duplicate_num_perm
+            directory = Path(settings.near_duplicate_dir) if settings.near_duplicate_dir else _SIGNATURE_DIR
+            index = MinHashLSHIndex(
+                directory / f"signatures-{num_perm}.bin",
+                num_perm,
+                _lsh_bands(num_perm, settings.near_duplicate_threshold)
+            )
+            index.load()
+            _INDEX = index
+        return _INDEX
+
+
+def check_near_duplicate(text: str) -> Dict[str, Any]:
+    """
+    Look up the closest stored near-duplicate of a document.
+
+    Returns:
+        Dictionary with the document's 'doc_id', its 'signature' (None for
+        text without words), 'stored' (whether this exact text is already in
+        the index) and 'duplicate_of': for a resubmission of the exact same
+        text {"doc_id" (its own), "similarity": 1.0, "exact": True}, otherwise
+        {"doc_id", "similarity", "exact": False} of the most similar other
+        stored document at or above `near_duplicate_threshold`, or None
+    """
+    doc_id = document_id(text)
+    signature = minhash_signature(text)
+    duplicate_of = None
+    stored = False
+    if signature is not None:
+        matches = get_index().query(signature, settings.near_duplicate_threshold)
+        stored = any(match_id == doc_id for match_id, _ in matches)
+        matches = [match for match in matches if match[0] != doc_id]
+        if stored:
+            duplicate_of = {"doc_id": doc_id, "similarity": 1.0, "exact": True}
+        elif matches:
+            duplicate_of = {"doc_id": matches[0][0], "similarity": matches[0][1], "exact": False}
+    with _STATS_LOCK:
+        _STATS["checked"] += 1
+        if stored:
+            _STATS["exact"] += 1
+        elif duplicate_of is not None:
+            _STATS["flagged"] += 1
+    return {"doc_id": doc_id, "signature": signature, "stored": stored, "duplicate_of": duplicate_of}
+
+
+def register_document(check: Dict[str, Any]) -> None:
+    """
+    Add a checked document to the index, unless it is already stored.
+    """
+    if check["signature"] is None or check["stored"]:
+        return
+    get_index().add(check["doc_id"], check["signature"])
+
+
+def record_action(action: str) -> None:
+    """
+    Count a near-duplicate that was skipped or sent to the delta path.
+    """
+    key = "skipped" if action == "skipped" else "delta"
+    with _STATS_LOCK:
+        _STATS[key] += 1
+
+
+def get_near_duplicate_stats() -> Dict[str, Any]:
+    """
+    Get near-duplicate detection settings, index size and counters.
+    """
+    num_perm = settings.near_duplicate_num_perm
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    return {
+        "enabled": settings.near_duplicate_enabled,
+        "mode": settings.near_duplicate_mode,
+        "threshold": settings.near_duplicate_threshold,
+        "num_perm": num_perm,
+        "bands": _lsh_bands(num_perm, settings.near_duplicate_threshold),
+        "documents": len(_INDEX) if _INDEX is not None else None,
+        **stats,
+    }
@@ -1,4 +1,5 @@
 import json
+import os
 from pathlib import Path
 from typing import Optional, Dict, Any, Union, List
 
@@ -6,15 +7,31 @@ from typing import Optional, Dict, Any, Union, List
 # Store in the storage directory
 _STORAGE_DIR = Path(__file__).parent
 _LAST_KG_FILE = _STORAGE_DIR / "last_kg.json"
+# Paragraph sources of ingested documents, by document id, reused for near-duplicates
+_DOCUMENTS_DIR = _STORAGE_DIR / "documents"
 
 # In-memory storage for conversation history
 _CONVERSATION_HISTORY: List[Dict[str, str]] = []
 
+# In-memory copy of last_kg.json, keyed by the file's (mtime, size) so that a
+# KG saved by another worker process is picked up on the next load.
+_LAST_KG_CACHE: Optional[Dict[str, Any]] = None
+_LAST_KG_CACHE_KEY: Optional[tuple] = None
+
+
+def _file_cache_key() -> Optional[tuple]:
+    try:
+        stat = _LAST_KG_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
 
 def save_last_kg(
     kg: Dict[str, Any], 
     visual_graph_nodes: Optional[Union[Dict[str, Any], str]] = None,
-    factual_triples: Optional[str] = None
+    factual_triples: Optional[str] = None,
+    source: Optional[Dict[str, Any]] = None
 ) -> None:
     """
     Save the last generated knowledge graph, visual graph nodes, and factual triples to a JSON file for persistence.
@@ -23,6 +40,7 @@ def save_last_kg(
         kg: The knowledge graph dictionary to save
         visual_graph_nodes: The visual graph nodes (dict or JSON string)
         factual_triples: The factual triples string
+        source: Paragraph blocks and per-fact provenance, used to diff revisions
     """
     try:
         # Ensure the storage directory exists
@@ -32,7 +50,8 @@ def save_last_kg(
         data_to_save = {
             "kg": kg,
             "visual_graph_nodes": visual_graph_nodes,
-            "factual_triples": factual_triples
+            "factual_triples": factual_triples,
+            "source": source
         }
         
         # Write the knowledge graph data to JSON file
@@ -41,35 +60,55 @@ def save_last_kg(
     except Exception as e:
         raise Exception(f"Failed to save knowledge graph: {str(e)}")
 
+    global _LAST_KG_CACHE, _LAST_KG_CACHE_KEY
+    _LAST_KG_CACHE = data_to_save
+    _LAST_KG_CACHE_KEY = _file_cache_key()
+
 
 def load_last_kg() -> Optional[Dict[str, Any]]:
     """
     Load the last generated knowledge graph data from the JSON file.
+    The parsed file is kept in memory and only re-read when the file changes.
     
     Returns:
-        Dictionary containing 'kg', 'visual_graph_nodes', and 'factual_triples' if it exists, None otherwise.
+        Dictionary containing 'kg', 'visual_graph_nodes', 'factual_triples' and 'source' if it exists, None otherwise.
         For backward compatibility, if the file contains only 'kg', returns just the kg dict.
     """
+    global _LAST_KG_CACHE, _LAST_KG_CACHE_KEY
     try:
-        if not _LAST_KG_FILE.exists():
+        cache_key = _file_cache_key()
+        if cache_key is None:
             return None
-        
-        with open(_LAST_KG_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-            
-            # New format - return all three components
-            return {
-                "kg": data.get("kg"),
-                "visual_graph_nodes": data.get("visual_graph_nodes"),
-                "factual_triples": data.get("factual_triples")
-            }
+
+        if _LAST_KG_CACHE is None or cache_key != _LAST_KG_CACHE_KEY:
+            with open(_LAST_KG_FILE, 'r', encoding='utf-8') as f:
+                _LAST_KG_CACHE = json.load(f)
+            _LAST_KG_CACHE_KEY = cache_key
+
+        data = _LAST_KG_CACHE
+        # New format - return all three components
+        return {
+            "kg": data.get("kg"),
+            "visual_graph_nodes": data.get("visual_graph_nodes"),
+            "factual_triples": data.get("factual_triples"),
+            "source": data.get("source")
+        }
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse knowledge graph JSON: {str(e)}")
     except Exception as e:
         raise Exception(f"Failed to load knowledge graph: {str(e)}")
 
 
+def get_kg_version() -> Optional[tuple]:
+    """
+    Get an identifier for the currently saved knowledge graph, without loading it.
+    
+    Returns:
+        A tuple that changes whenever last_kg.json is rewritten, or None if no KG has been saved
+    """
+    return _file_cache_key()
+
+
 def get_last_kg() -> Optional[Dict[str, Any]]:
     """
     Alias for load_last_kg() for backward compatibility.
@@ -79,6 +118,42 @@ def get_last_kg() -> Optional[Dict[str, Any]]:
     """
     return load_last_kg()
 
+def save_document_source(doc_id: str, source: Dict[str, Any]) -> None:
+    """
+    Save the paragraph source (blocks and provenance) of an ingested document.
+    
+    Args:
+        doc_id: Document content id
+        source: The 'source' built with the document's KG
+    """
+    try:
+        _DOCUMENTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = _DOCUMENTS_DIR / f"{doc_id}.json"
+        # Write then rename, so other workers never read a partial file.
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(source, f, ensure_ascii=False)
+        tmp_path.replace(path)
+    except Exception as e:
+        raise Exception(f"Failed to save document source: {str(e)}")
+
+
+def load_document_source(doc_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the paragraph source of an ingested document.
+    
+    Returns:
+        The saved source, or None if the document has none
+    """
+    try:
+        with open(_DOCUMENTS_DIR / f"{doc_id}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse document source JSON: {str(e)}")
+
+
 def save_conversation_history(conversation_history: List[Dict[str, str]]) -> None:
     """
     Save conversation history to in-memory storage.
@@ -0,0 +1,85 @@
+"""
+Startup-time benchmark.
+
+Starts a fresh interpreter per run, imports the app, runs the startup handler
+and waits for readiness, then reports import and time-to-ready against
+STARTUP_BUDGET_SECONDS. Exits non-zero when the median exceeds the budget.
+
+Usage (from knowledge-graph-server/):
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_SERVER_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+from app.main import app
+from app.core.startup import on_startup, wait_until_ready, get_startup_report
+t_import = time.perf_counter() - t0
+on_startup()
+t_startup_returned = time.perf_counter() - t0
+wait_until_ready(60)
+t_ready = time.perf_counter() - t0
+print(json.dumps({
+    "import": t_import,
+    "startup_handler": t_startup_returned,
+    "ready": t_ready,
+    "report": get_startup_report(),
+}))
+"""
+
+
+def _run_once(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=_SERVER_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="Override STARTUP_BUDGET_SECONDS")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench-key")
+    # The benchmark measures local start-up cost, not provider round-trips.
+    env.setdefault("WARMUP_LLM_CONNECTION", "false")
+    if args.budget is not None:
+        env["STARTUP_BUDGET_SECONDS"] = str(args.budget)
+
+    runs = [_run_once(env) for _ in range(args.runs)]
+    budget = runs[0]["report"]["budget_seconds"]
+    summary = {
+        phase: {
+            "median": statistics.median(r[phase] for r in runs),
+            "max": max(r[phase] for r in runs),
+        }
+        for phase in ("import", "startup_handler", "ready")
+    }
+    within_budget = summary["ready"]["median"] <= budget
+
+    if args.json:
+        print(json.dumps({"runs": runs, "summary": summary, "budget_seconds": budget,
+                          "within_budget": within_budget}, indent=2))
+    else:
+        for phase, stats in summary.items():
+            print(f"{phase:<16} median {stats['median'] * 1000:8.1f} ms   max {stats['max'] * 1000:8.1f} ms")
+        print(f"{'budget':<16} {budget * 1000:15.1f} ms   {'OK' if within_budget else 'OVER BUDGET'}")
+
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
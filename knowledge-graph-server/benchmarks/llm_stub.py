@@ -0,0 +1,201 @@
+"""
+OpenAI-compatible stub server for load tests.
+
+Serves POST /v1/chat/completions and GET /v1/models with canned knowledge
+graph, triplet and answer payloads, after an injected latency, and fails a
+configurable fraction of requests. Streaming requests ("stream": true) get
+the reply as SSE chunks, one word per --token-delay-ms.
+
+Usage (from knowledge-graph-server/):
+    python benchmarks/llm_stub.py --port 5055 --latency-ms 800 --jitter-ms 200 --error-rate 0.01
+
+Then start the app with OPENAI_BASE_URL=http://127.0.0.1:5055/v1.
+"""
+import argparse
+import json
+import random
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_KG = {
+    "entities": {
+        "E1": {"name": "XYZ Global Holdings Limited", "type": "COMPANY", "properties": {"country": "India"}},
+        "E2": {"name": "XYZ Retail & Consumer Services Limited", "type": "SUBSIDIARY", "properties": {}},
+        "E3": {"name": "Energy, Chemicals & Materials Segment", "type": "SEGMENT", "properties": {}},
+    },
+    "measurements": {
+        "M1": {"metric": "REVENUE", "value": 1146000000000, "unit": "INR", "period": "FY 2024-25"},
+        "M2": {"metric": "PROFIT", "value": 912000000000, "unit": "INR", "period": "FY 2024-25"},
+    },
+    "facts": [
+        {"subject": "E1", "predicate": "PARENT_OF", "object": "E2"},
+        {"subject": "E1", "predicate": "HAS_MEASUREMENT", "object": "M1"},
+        {"subject": "E3", "predicate": "HAS_MEASUREMENT", "object": "M2"},
+    ],
+}
+
+_TRIPLES = "\n".join([
+    "(XYZ Global Holdings Limited, PARENT_OF, XYZ Retail & Consumer Services Limited)",
+    "(XYZ Global Holdings Limited, REPORTED_REVENUE, INR 1,146,000,000,000 in FY 2024-25)",
+    "(Energy, Chemicals & Materials Segment, PROFIT, INR 912,000,000,000 in FY 2024-25)",
+])
+
+_ANSWER = "XYZ Global Holdings Limited reported revenue of INR 1,146,000,000,000 in FY 2024-25."
+
+_PARAGRAPH_TAG_RE = re.compile(r"^\s*\[(P\d+)\]", re.MULTILINE)
+_FACT_PARAGRAPH_RE = re.compile(r'"paragraph": "(P\d+)"')
+
+
+def _reply_for(messages) -> str:
+    system = messages[0].get("content", "") if messages else ""
+    if "factual query engine" in system:
+        return _ANSWER
+    if "extract the factual triplets" in system:
+        # Tag each triple with the paragraph of the matching canned fact.
+        tags = _FACT_PARAGRAPH_RE.findall(system)
+        lines = _TRIPLES.split("\n")
+        return "\n".join(f"[{tags[i]}] {line}" if i < len(tags) else line for i, line in enumerate(lines))
+    # Spread the canned facts over the paragraphs of the text being extracted.
+    tags = _PARAGRAPH_TAG_RE.findall(system.rpartition("<<<")[2])
+    kg = dict(_KG, facts=[
+        dict(fact, paragraph=tags[i % len(tags)]) if tags else fact for i, fact in enumerate(_KG["facts"])
+    ])
+    return json.dumps(kg)
+
+
+class StubConfig:
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    error_rate = 0.0
+    error_status = 500
+    token_delay_ms = 20.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        delay = max(0.0, random.gauss(StubConfig.latency_ms, StubConfig.jitter_ms)) / 1000.0
+        time.sleep(delay)
+
+        if random.random() < StubConfig.error_rate:
+            self._send_json(StubConfig.error_status, {"error": {"message": "injected failure", "type": "stub_error"}})
+            return
+
+        messages = request.get("messages", [])
+        content = _reply_for(messages)
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_chars // 4 + len(content) // 4,
+        }
+        if request.get("stream"):
+            self._stream(request, content, usage)
+            return
+
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, request, content: str, usage) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def send(payload) -> None:
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            return json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                "usage": chunk_usage,
+            })
+
+        try:
+            send(chunk({"role": "assistant", "content": ""}))
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                time.sleep(StubConfig.token_delay_ms / 1000.0)
+                send(chunk({"content": word if i == 0 else " " + word}))
+            send(chunk({}, finish_reason="stop"))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                send(chunk(None, chunk_usage=usage))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream: stop generating.
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Mean injected latency per completion")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Standard deviation of injected latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of completions that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected failures")
+    parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Delay between streamed words")
+    args = parser.parse_args()
+
+    StubConfig.latency_ms = args.latency_ms
+    StubConfig.jitter_ms = args.jitter_ms
+    StubConfig.error_rate = args.error_rate
+    StubConfig.error_status = args.error_status
+    StubConfig.token_delay_ms = args.token_delay_ms
+
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
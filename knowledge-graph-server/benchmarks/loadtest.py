@@ -0,0 +1,360 @@
+"""
+Concurrent HTTP load test with SLO reporting.
+
+Drives open-loop mixed traffic (Poisson arrivals) at one or more target
+rates against the API and reports, per endpoint and rate step, p50/p95/p99
+latency, throughput, error rate and the first rate at which the endpoint
+saturated (missed its p95 SLO, exceeded the error budget, or fell behind
+the offered rate).
+
+Either point it at a running server with --base-url, or let it spawn the LLM
+stub (benchmarks/llm_stub.py) and the app itself with --spawn, which makes it
+easy to compare worker counts and server modes.
+
+Usage (from knowledge-graph-server/):
+    python benchmarks/loadtest.py --spawn --workers 4 --rates 2,5,10,20 --duration 30
+    python benchmarks/loadtest.py --spawn --server gunicorn --workers 8 --stub-latency-ms 1500 \\
+        --json-out results.json
+    python benchmarks/loadtest.py --base-url http://localhost:5050 --rates 5 --mix query=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+_SERVER_DIR = Path(__file__).resolve().parent.parent
+_DEFAULT_DOC = _SERVER_DIR.parent / "financial-documents" / "sample-1.txt"
+
+ENDPOINTS = {
+    "generate": ("POST", "/api/generate-knowledge-graph"),
+    "query": ("POST", "/api/query-knowledge-graph"),
+    "clear": ("POST", "/api/clear-conversation"),
+    "allowed-types": ("GET", "/api/allowed-types"),
+}
+
+_QUESTIONS = [
+    "What revenue was reported?",
+    "Which subsidiaries are mentioned?",
+    "What was the profit of the segment?",
+    "Who is the parent company?",
+]
+
+
+def _parse_kv(value: str, cast) -> Dict[str, Any]:
+    result = {}
+    for part in filter(None, value.split(",")):
+        key, _, raw = part.partition("=")
+        result[key.strip()] = cast(raw)
+    return result
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+class _Spawned:
+    """
+    LLM stub plus app server subprocesses for a self-contained run.
+    """
+
+    def __init__(self, args):
+        self.procs: List[subprocess.Popen] = []
+        stub_port = _free_port()
+        app_port = _free_port()
+        self.base_url = f"http://127.0.0.1:{app_port}"
+
+        self.procs.append(subprocess.Popen([
+            sys.executable, str(_SERVER_DIR / "benchmarks" / "llm_stub.py"),
+            "--port", str(stub_port),
+            "--latency-ms", str(args.stub_latency_ms),
+            "--jitter-ms", str(args.stub_jitter_ms),
+            "--error-rate", str(args.stub_error_rate),
+        ], cwd=_SERVER_DIR, stdout=subprocess.DEVNULL))
+        _wait_for(f"http://127.0.0.1:{stub_port}/v1/models", 10)
+
+        env = dict(os.environ)
+        env.update({
+            "OPENAI_API_KEY": "loadtest",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        })
+        if args.server == "gunicorn":
+            cmd = [
+                sys.executable, "-m", "gunicorn", "app.main:app",
+                "-k", "uvicorn.workers.UvicornWorker",
+                "-w", str(args.workers), "-b", f"127.0.0.1:{app_port}",
+            ]
+        else:
+            cmd = [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(app_port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ]
+        self.procs.append(subprocess.Popen(cmd, cwd=_SERVER_DIR, env=env))
+        _wait_for(f"{self.base_url}/api/health/ready", 60)
+
+    def close(self) -> None:
+        for proc in reversed(self.procs):
+            proc.send_signal(signal.SIGINT)
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _generate_body(doc: str, same_doc: bool) -> Dict[str, Any]:
+    # Identical documents would be coalesced into one extraction (and linked as
+    # duplicates), so each request gets its own closing paragraph unless
+    # --same-doc asks for that on purpose.
+    if same_doc:
+        return {"text": doc}
+    return {"text": f"{doc.rstrip()}\n\nLoad test request {uuid.uuid4().hex}."}
+
+
+async def _issue(client: httpx.AsyncClient, name: str, doc: str, same_doc: bool,
+                 results: List[Dict[str, Any]]) -> None:
+    method, path = ENDPOINTS[name]
+    if name == "generate":
+        kwargs = {"json": _generate_body(doc, same_doc)}
+    elif name == "query":
+        kwargs = {"json": {"query": random.choice(_QUESTIONS)}}
+    elif name == "clear":
+        kwargs = {"json": {}}
+    else:
+        kwargs = {}
+
+    started = time.perf_counter()
+    status = None
+    error = None
+    try:
+        response = await client.request(method, path, **kwargs)
+        status = response.status_code
+        await response.aread()
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    results.append({
+        "endpoint": name,
+        "started": started,
+        "latency": time.perf_counter() - started,
+        "status": status,
+        "ok": status is not None and status < 400,
+        "error": error,
+    })
+
+
+async def _run_step(client: httpx.AsyncClient, rate: float, duration: float, mix: Dict[str, float],
+                    doc: str, same_doc: bool, rng: random.Random) -> Dict[str, Any]:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    results: List[Dict[str, Any]] = []
+    tasks = []
+    offered = {n: 0 for n in names}
+
+    step_started = time.perf_counter()
+    next_at = step_started
+    while True:
+        next_at += rng.expovariate(rate)
+        if next_at - step_started >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        name = rng.choices(names, weights)[0]
+        offered[name] += 1
+        tasks.append(asyncio.create_task(_issue(client, name, doc, same_doc, results)))
+
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - step_started
+    return {"rate": rate, "started": step_started, "duration": duration, "wall": wall,
+            "offered": offered, "results": results}
+
+
+def _summarise_step(step: Dict[str, Any], slo_p95_ms: Dict[str, float], max_error_rate: float) -> Dict[str, Any]:
+    summary = {"offered_rate": step["rate"], "wall_seconds": step["wall"], "endpoints": {}}
+    window_end = step["started"] + step["duration"]
+    for name, offered in step["offered"].items():
+        rows = [r for r in step["results"] if r["endpoint"] == name]
+        ok_latencies = sorted(r["latency"] * 1000 for r in rows if r["ok"])
+        errors = len(rows) - len(ok_latencies)
+        p95 = _percentile(ok_latencies, 95)
+        slo = slo_p95_ms.get(name, slo_p95_ms.get("default"))
+        # Requests must finish within one SLO of the end of the arrival window;
+        # a backlog that takes longer to drain means the server fell behind.
+        drain_deadline = window_end + (slo or 0.0) / 1000.0
+        in_window = sum(1 for r in rows if r["ok"] and r["started"] + r["latency"] <= drain_deadline)
+        error_rate = errors / len(rows) if rows else 0.0
+        breaches = []
+        if slo is not None and p95 is not None and p95 > slo:
+            breaches.append(f"p95 {p95:.0f}ms > SLO {slo:.0f}ms")
+        if error_rate > max_error_rate:
+            breaches.append(f"error rate {error_rate:.1%} > {max_error_rate:.1%}")
+        if offered and in_window < 0.9 * offered:
+            breaches.append(f"only {in_window}/{offered} completed in time")
+        summary["endpoints"][name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": error_rate,
+            "error_kinds": sorted({r["error"] or str(r["status"]) for r in rows if not r["ok"]}),
+            "throughput_rps": len(ok_latencies) / step["wall"] if step["wall"] else 0.0,
+            "latency_ms": {
+                "p50": _percentile(ok_latencies, 50),
+                "p95": p95,
+                "p99": _percentile(ok_latencies, 99),
+                "max": ok_latencies[-1] if ok_latencies else None,
+            },
+            "slo_p95_ms": slo,
+            "saturated": bool(breaches),
+            "breaches": breaches,
+        }
+    return summary
+
+
+async def _run(args, base_url: str) -> Dict[str, Any]:
+    mix = _parse_kv(args.mix, float)
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    slo = _parse_kv(args.slo_p95_ms, float)
+    doc = Path(args.doc).read_text(encoding="utf-8")
+    rng = random.Random(args.seed)
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # Queries need a knowledge graph to exist.
+        await client.post(ENDPOINTS["generate"][1], json=_generate_body(doc, args.same_doc))
+
+        steps = []
+        for rate in [float(r) for r in args.rates.split(",")]:
+            step = await _run_step(client, rate, args.duration, mix, doc, args.same_doc, rng)
+            steps.append(_summarise_step(step, slo, args.max_error_rate))
+
+    saturation = {}
+    for name in mix:
+        first = next((s for s in steps if s["endpoints"][name]["saturated"]), None)
+        saturation[name] = {
+            "saturated_at_rate": first["offered_rate"] if first else None,
+            "breaches": first["endpoints"][name]["breaches"] if first else [],
+        }
+
+    return {
+        "config": {
+            "base_url": base_url,
+            "server": args.server if args.spawn else None,
+            "workers": args.workers if args.spawn else None,
+            "stub": {
+                "latency_ms": args.stub_latency_ms,
+                "jitter_ms": args.stub_jitter_ms,
+                "error_rate": args.stub_error_rate,
+            } if args.spawn else None,
+            "rates": args.rates,
+            "duration": args.duration,
+            "mix": mix,
+            "same_doc": args.same_doc,
+            "slo_p95_ms": slo,
+            "max_error_rate": args.max_error_rate,
+        },
+        "steps": steps,
+        "saturation": saturation,
+    }
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def _print_summary(report: Dict[str, Any]) -> None:
+    config = report["config"]
+    if config["server"]:
+        print(f"server={config['server']} workers={config['workers']} stub={config['stub']}")
+    header = f"{'rate':>6} {'endpoint':<14} {'reqs':>6} {'err%':>6} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7}  status"
+    print(header)
+    print("-" * len(header))
+    for step in report["steps"]:
+        for name, ep in step["endpoints"].items():
+            lat = ep["latency_ms"]
+            status = "SATURATED: " + "; ".join(ep["breaches"]) if ep["saturated"] else "ok"
+            print(f"{step['offered_rate']:>6g} {name:<14} {ep['requests']:>6} {ep['error_rate'] * 100:>6.1f} "
+                  f"{ep['throughput_rps']:>7.2f} {_fmt_ms(lat['p50']):>7} {_fmt_ms(lat['p95']):>7} "
+                  f"{_fmt_ms(lat['p99']):>7}  {status}")
+    print()
+    for name, sat in report["saturation"].items():
+        where = f"at {sat['saturated_at_rate']:g} req/s" if sat["saturated_at_rate"] is not None else "not reached"
+        print(f"saturation {name:<14} {where}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_argument_group("target")
+    target.add_argument("--base-url", default="http://localhost:5050")
+    target.add_argument("--spawn", action="store_true", help="Start the LLM stub and the app as subprocesses")
+    target.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    target.add_argument("--workers", type=int, default=1)
+    target.add_argument("--stub-latency-ms", type=float, default=500.0)
+    target.add_argument("--stub-jitter-ms", type=float, default=100.0)
+    target.add_argument("--stub-error-rate", type=float, default=0.0)
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--rates", default="1,2,5,10", help="Comma-separated total arrival rates (req/s), run in order")
+    load.add_argument("--duration", type=float, default=30.0, help="Seconds per rate step")
+    load.add_argument("--mix", default="generate=1,query=6,clear=1,allowed-types=2",
+                      help="Endpoint weights: generate, query, clear, allowed-types")
+    load.add_argument("--doc", default=str(_DEFAULT_DOC), help="Document text used for generate requests")
+    load.add_argument("--same-doc", action="store_true",
+                      help="Send the identical document in every generate request, to measure request coalescing "
+                           "and near-duplicate handling; by default each request appends a unique paragraph")
+    load.add_argument("--timeout", type=float, default=120.0)
+    load.add_argument("--max-connections", type=int, default=1000)
+    load.add_argument("--seed", type=int, default=0)
+
+    slo = parser.add_argument_group("SLO")
+    slo.add_argument("--slo-p95-ms", default="generate=15000,query=5000,default=500",
+                     help="Per-endpoint p95 latency SLOs; 'default' applies to the rest")
+    slo.add_argument("--max-error-rate", type=float, default=0.01)
+
+    parser.add_argument("--json-out", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    spawned = _Spawned(args) if args.spawn else None
+    try:
+        report = asyncio.run(_run(args, spawned.base_url if spawned else args.base_url))
+    finally:
+        if spawned:
+            spawned.close()
+
+    _print_summary(report)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import json
+import os
+import re
+from types import SimpleNamespace
+
+import pytest
+
+# Settings require an API key; tests never call the LLM.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+_TAGGED_PARAGRAPH_RE = re.compile(r"^\s*\[(P\d+)\] ", re.MULTILINE)
+_REVENUE_RE = re.compile(r"([A-Z][\w ]*?) reported revenue of (\d+)")
+_OWNS_RE = re.compile(r"([A-Z][\w ]*?) owns ([A-Z][\w ]*?)\.")
+
+
+class FakeLLM:
+    """
+    Stands in for `chat_completion`. Extraction turns each "X reported
+    revenue of N" and "X owns Y." of the tagged paragraphs into facts, tagged
+    with their paragraph unless `tagged` is false; triplets lists each fact
+    with its tag.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.tagged = True
+
+    def __call__(self, stage, model, messages, **kwargs):
+        self.calls += 1
+        system = messages[0]["content"]
+        if "extract the factual triplets" in system:
+            content = self._triplets(system)
+        else:
+            content = json.dumps(self._extract(system.rpartition("<<<")[2].rpartition(">>>")[0]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _extract(self, text):
+        kg = {"entities": {}, "measurements": {}, "facts": []}
+        names = {}
+
+        def entity(name):
+            if name not in names:
+                names[name] = f"E{len(names) + 1}"
+                kg["entities"][names[name]] = {"name": name, "type": "COMPANY", "properties": {}}
+            return names[name]
+
+        def fact(subject, predicate, obj, tag):
+            kg["facts"].append(dict(
+                {"subject": subject, "predicate": predicate, "object": obj}, **({"paragraph": tag} if self.tagged else {})
+            ))
+
+        parts = _TAGGED_PARAGRAPH_RE.split(text)
+        for tag, paragraph in zip(parts[1::2], parts[2::2]):
+            for name, value in _REVENUE_RE.findall(paragraph):
+                mid = f"M{len(kg['measurements']) + 1}"
+                kg["measurements"][mid] = {"metric": "REVENUE", "value": int(value), "unit": "INR_CRORE"}
+                fact(entity(name), "HAS_MEASUREMENT", mid, tag)
+            for owner, owned in _OWNS_RE.findall(paragraph):
+                fact(entity(owner), "OWNS", entity(owned), tag)
+        return kg
+
+    def _triplets(self, system):
+        kg = json.loads(system.split("Knowledge Graph:", 1)[1].split("Rules:", 1)[0])
+        lines = []
+        for fact in kg["facts"]:
+            subject = kg["entities"][fact["subject"]]["name"]
+            if fact["object"] in kg["measurements"]:
+                line = f"({subject}, REPORTED_REVENUE, INR {kg['measurements'][fact['object']]['value']} crore)"
+            else:
+                line = f"({subject}, {fact['predicate']}, {kg['entities'][fact['object']]['name']})"
+            lines.append(f"[{fact['paragraph']}] {line}" if fact.get("paragraph") else line)
+        return "\n".join(lines)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from app.services import kg_extractor
+
+    llm = FakeLLM()
+    monkeypatch.setattr(kg_extractor, "chat_completion", llm)
+    monkeypatch.setattr(kg_extractor, "get_llm", lambda: object())
+    return llm
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """
+    Point the KG, document source and near-duplicate stores at a temporary directory.
+    """
+    from app.core.config import settings
+    from app.services import near_duplicates
+    from app.storage import cache
+
+    monkeypatch.setattr(cache, "_STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(cache, "_LAST_KG_FILE", tmp_path / "last_kg.json")
+    monkeypatch.setattr(cache, "_DOCUMENTS_DIR", tmp_path / "documents")
+    monkeypatch.setattr(cache, "_LAST_KG_CACHE", None)
+    monkeypatch.setattr(cache, "_LAST_KG_CACHE_KEY", None)
+    monkeypatch.setattr(settings, "near_duplicate_dir", str(tmp_path / "minhash"))
+    monkeypatch.setattr(near_duplicates, "_INDEX", None)
+    return tmp_path
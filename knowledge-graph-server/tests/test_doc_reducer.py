@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from app.services.doc_reducer import reduce_document
+
+_DOCUMENTS = Path(__file__).resolve().parents[2] / "financial-documents"
+
+
+def test_keeps_figure_table_rows():
+    rows = ["Revenue FY2023: 100 crore", "Revenue FY2024: 120 crore", "Revenue FY2025: 150 crore"]
+    reduced = reduce_document("Acme Industries grew steadily.\n\n" + "\n".join(rows))["text"]
+
+    for row in rows:
+        assert row in reduced
+
+
+def test_keeps_bare_numbers_inside_a_table():
+    reduced = reduce_document("Segment revenue (INR crore)\nPower\n412\nGas\n318")["text"]
+
+    assert "412" in reduced
+    assert "318" in reduced
+
+
+def test_drops_page_numbers():
+    text = (
+        "Revenue rose to INR 500 crore.\n\n12\n\n"
+        "EBITDA was INR 90 crore.\nPage 13\n"
+        "Net profit was INR 40 crore.\n- 14 -\n"
+        "Capex was INR 70 crore.\n15 of 40"
+    )
+    reduced = reduce_document(text)["text"]
+
+    assert reduced == (
+        "Revenue rose to INR 500 crore.\n\n"
+        "EBITDA was INR 90 crore. Net profit was INR 40 crore. Capex was INR 70 crore."
+    )
+
+
+def test_drops_running_headers_and_footers():
+    pages = [
+        f"Acme Industries Annual Report\nParagraph {i} reports revenue of INR {i}00 crore.\nConfidential | Page {i}"
+        for i in range(1, 4)
+    ]
+    reduced = reduce_document("\n\n".join(pages))["text"]
+
+    assert "Annual Report" not in reduced
+    assert "Confidential" not in reduced
+    for i in range(1, 4):
+        assert f"Paragraph {i} reports revenue of INR {i}00 crore." in reduced
+
+
+def test_drops_table_of_contents():
+    text = (
+        "Contents\nChairman's letter\nFinancial highlights\nOutlook\n\n"
+        "Directors' report .......... 4\n\n"
+        "Revenue grew 12% to INR 1,250 crore."
+    )
+
+    assert reduce_document(text)["text"] == "Revenue grew 12% to INR 1,250 crore."
+
+
+def test_drops_disclaimer_sentences_without_figures():
+    text = (
+        "Disclaimer: This document is for informational purposes only. It does not constitute an offer.\n\n"
+        "This report contains forward-looking statements. Revenue is expected to grow 8% in FY 2026."
+    )
+
+    assert reduce_document(text)["text"] == "Revenue is expected to grow 8% in FY 2026."
+
+
+def test_keeps_sample_2_outlook():
+    reduced = reduce_document((_DOCUMENTS / "sample-2.txt").read_text(encoding="utf-8"))["text"]
+
+    for figure in ("5–6% annually", "300 basis points", "20 GW", "INR 1.32 trillion"):
+        assert figure in reduced
+
+
+def test_keeps_every_figure_when_pruning():
+    text = (_DOCUMENTS / "sample-2.txt").read_text(encoding="utf-8")
+    reduced = reduce_document(text, keep_ratio=0.5, document_chars=10 ** 6)
+
+    assert reduced["sentences_kept"] < reduced["sentences_total"]
+    for figure in ("INR 4.28 trillion", "1.4x", "INR 192 billion", "INR 1.32 trillion"):
+        assert figure in reduced["text"]
@@ -0,0 +1,13 @@
+import json
+
+from app.services.kg_extractor import _system_prompt_parts
+from app.services.kg_validator import validate_kg
+
+
+def test_prompt_example_output_passes_validation():
+    # The cascade escalates on validation errors, so a model that follows the
+    # prompt's own example must not be escalated.
+    head, _ = _system_prompt_parts()
+    example = head.split("Output:", 1)[1].split("VERY IMPORTANT", 1)[0]
+
+    assert validate_kg(json.loads(example)) == []
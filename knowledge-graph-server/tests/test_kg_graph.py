@@ -0,0 +1,100 @@
+import copy
+import random
+
+from app.services.kg_graph import CompactKG
+
+
+def _dict_prune_isolated_nodes(graph):
+    # The dict-based prune that CompactKG.prune_isolated replaced.
+    used_entities = set()
+    used_measurements = set()
+
+    for fact in graph["facts"]:
+        used_entities.add(fact["subject"])
+
+        if fact["object"].startswith("E"):
+            used_entities.add(fact["object"])
+        elif fact["object"].startswith("M"):
+            used_measurements.add(fact["object"])
+
+    graph["entities"] = {
+        eid: e for eid, e in graph["entities"].items()
+        if eid in used_entities
+    }
+
+    graph["measurements"] = {
+        mid: m for mid, m in graph["measurements"].items()
+        if mid in used_measurements
+    }
+
+    return graph
+
+
+def _compact_prune(graph):
+    return CompactKG.from_dict(graph).prune_isolated().to_dict()
+
+
+def _random_graph(rng):
+    num_entities = rng.randint(0, 12)
+    num_measurements = rng.randint(0, 12)
+    entities = {f"E{i}": {"name": f"Entity {i}", "type": "COMPANY", "properties": {}} for i in range(1, num_entities + 1)}
+    measurements = {
+        f"M{i}": {"metric": "REVENUE", "value": i, "unit": "INR_CRORE"} for i in range(1, num_measurements + 1)
+    }
+    # Ids one past the defined ones are dangling references.
+    ids = [f"E{i}" for i in range(1, num_entities + 2)] + [f"M{i}" for i in range(1, num_measurements + 2)]
+    facts = [
+        {"subject": rng.choice(ids), "predicate": rng.choice(["HAS_METRIC", "REPORTED_IN_PERIOD", "OWNS"]), "object": rng.choice(ids)}
+        for _ in range(rng.randint(0, 20))
+    ]
+    return {"entities": entities, "measurements": measurements, "facts": facts}
+
+
+def test_prune_matches_dict_prune_on_random_graphs():
+    rng = random.Random(0)
+    for _ in range(500):
+        graph = _random_graph(rng)
+        expected = _dict_prune_isolated_nodes(copy.deepcopy(graph))
+        assert _compact_prune(graph) == expected
+
+
+def test_prune_keeps_facts_of_measurement_used_as_subject():
+    graph = {
+        "entities": {"E1": {"name": "FY 2024-25", "type": "PERIOD", "properties": {}}},
+        "measurements": {"M1": {"metric": "REVENUE", "value": 10, "unit": "INR_CRORE"}},
+        "facts": [{"subject": "M1", "predicate": "REPORTED_IN_PERIOD", "object": "E1"}],
+    }
+    pruned = CompactKG.from_dict(graph).prune_isolated()
+
+    assert pruned.to_dict() == _dict_prune_isolated_nodes(copy.deepcopy(graph))
+    assert pruned.in_degree().tolist() == [1, 0]
+    assert pruned.spring_layout(seed=42).shape == (2, 2)
+
+
+def test_records_round_trip_through_columns():
+    graph = {
+        "entities": {
+            "E1": {"name": "Acme Ltd", "type": "COMPANY", "properties": {"country": "India"}},
+            "E2": {"name": "Acme Ltd", "type": "SUBSIDIARY", "properties": {}, "alias": "Acme"},
+            "E3": {"name": 42, "type": None, "properties": None},
+        },
+        "measurements": {
+            "M1": {"metric": "REVENUE", "value": 1146000000000, "unit": "INR", "period": "FY 2024-25"},
+            "M2": {"metric": "MARGIN", "value": 12.5, "unit": "PERCENT", "period": None},
+            "M3": {"metric": "GUIDANCE", "value": "5-6%", "paragraph": "P2"},
+            "M4": {"metric": "COUNT", "unit": "NUMBER"},
+        },
+        "facts": [
+            {"subject": f"E{i % 3 + 1}", "predicate": "HAS_MEASUREMENT", "object": f"M{i}"} for i in range(1, 5)
+        ] + [{"subject": "E1", "predicate": "OWNS", "object": "E2"}, {"subject": "E3", "predicate": "OWNS", "object": "E1"}],
+    }
+    compact = CompactKG.from_dict(graph)
+
+    assert compact.to_dict() == graph
+    assert compact.record(compact.node_index["M1"]) == graph["measurements"]["M1"]
+    assert compact.prune_isolated().to_dict() == graph
+    # Entities without properties get an empty dict.
+    no_properties = {"entities": {"E1": {"name": "Acme", "type": "COMPANY"}}, "measurements": {}, "facts": []}
+    assert CompactKG.from_dict(no_properties).to_dict()["entities"]["E1"] == {
+        "name": "Acme", "type": "COMPANY", "properties": {}
+    }
@@ -0,0 +1,193 @@
+import pytest
+
+from app.core.config import settings
+from app.services.kg_revision import build_knowledge_graph, merge_blocks, split_paragraphs
+
+_PARAGRAPHS = [
+    "Acme Ltd reported revenue of 100 crore in FY 2024-25.",
+    "Beta Power reported revenue of 200 crore in FY 2024-25.",
+    "Acme Ltd owns Beta Power.",
+]
+
+
+def _document(paragraphs):
+    return "\n\n".join(paragraphs)
+
+
+def _facts(result):
+    """
+    The facts of a result as (subject name, predicate, object name or value).
+    """
+    kg = result["kg"]
+    names = {eid: e["name"] for eid, e in kg["entities"].items()}
+    names.update({mid: m["value"] for mid, m in kg["measurements"].items()})
+    return {(names[f["subject"]], f["predicate"], names[f["object"]]) for f in kg["facts"]}
+
+
+def _paragraph_id(text):
+    return split_paragraphs(text)[0]["id"]
+
+
+@pytest.fixture
+def previous(fake_llm):
+    result = build_knowledge_graph(_document(_PARAGRAPHS))
+    fake_llm.calls = 0
+    return result
+
+
+def test_first_build_extracts_every_paragraph_in_one_block(fake_llm):
+    result = build_knowledge_graph(_document(_PARAGRAPHS))
+
+    assert fake_llm.calls == 2
+    assert result["revision"]["blocks_extracted"] == 1
+    assert result["revision"]["paragraphs_extracted"] == 3
+    assert _facts(result) == {
+        ("Acme Ltd", "HAS_MEASUREMENT", 100),
+        ("Beta Power", "HAS_MEASUREMENT", 200),
+        ("Acme Ltd", "OWNS", "Beta Power"),
+    }
+
+
+def test_paragraph_tags_map_to_paragraph_ids(previous):
+    block = previous["source"]["blocks"][0]
+    ids = [_paragraph_id(text) for text in _PARAGRAPHS]
+
+    assert [fact["paragraph"] for fact in block["kg"]["facts"]] == ids
+    assert block["triple_paragraphs"] == ids
+    assert block["triples"].split("\n") == [
+        "(Acme Ltd, REPORTED_REVENUE, INR 100 crore)",
+        "(Beta Power, REPORTED_REVENUE, INR 200 crore)",
+        "(Acme Ltd, OWNS, Beta Power)",
+    ]
+    assert previous["source"]["provenance"]["facts"] == [[pid] for pid in ids]
+    assert previous["source"]["provenance"]["measurements"] == {"M1": [ids[0]], "M2": [ids[1]]}
+
+
+def test_unchanged_document_makes_no_calls(fake_llm, previous):
+    result = build_knowledge_graph(_document(_PARAGRAPHS), previous_source=previous["source"])
+
+    assert fake_llm.calls == 0
+    assert result["revision"]["blocks_reused"] == 1
+    assert result["kg"] == previous["kg"]
+    assert result["factual_triples"] == previous["factual_triples"]
+
+
+def test_changed_paragraph_is_reextracted_and_its_facts_retracted(fake_llm, previous):
+    paragraphs = [_PARAGRAPHS[0], "Beta Power reported revenue of 250 crore in FY 2024-25.", _PARAGRAPHS[2]]
+    result = build_knowledge_graph(_document(paragraphs), previous_source=previous["source"])
+
+    assert fake_llm.calls == 2
+    revision = result["revision"]
+    assert revision["blocks_trimmed"] == 1
+    assert revision["blocks_extracted"] == 1
+    assert revision["paragraphs_extracted"] == 1
+    assert revision["paragraphs_reused"] == 2
+    assert revision["facts_retracted"] == 1
+    assert revision["measurements_retracted"] == 1
+    assert _facts(result) == {
+        ("Acme Ltd", "HAS_MEASUREMENT", 100),
+        ("Beta Power", "HAS_MEASUREMENT", 250),
+        ("Acme Ltd", "OWNS", "Beta Power"),
+    }
+    assert "INR 200 crore" not in result["factual_triples"]
+    assert "(Beta Power, REPORTED_REVENUE, INR 250 crore)" in result["factual_triples"]
+
+
+def test_removed_paragraph_is_retracted_without_calls(fake_llm, previous):
+    result = build_knowledge_graph(_document([_PARAGRAPHS[0], _PARAGRAPHS[2]]), previous_source=previous["source"])
+
+    assert fake_llm.calls == 0
+    revision = result["revision"]
+    assert revision["blocks_trimmed"] == 1
+    assert revision["paragraphs_extracted"] == 0
+    assert revision["facts_retracted"] == 1
+    assert revision["measurements_retracted"] == 1
+    assert _facts(result) == {("Acme Ltd", "HAS_MEASUREMENT", 100), ("Acme Ltd", "OWNS", "Beta Power")}
+    assert "Beta Power, REPORTED_REVENUE" not in result["factual_triples"]
+
+
+def test_added_paragraph_is_the_only_one_extracted(fake_llm, previous):
+    added = "Gamma Gas reported revenue of 300 crore in FY 2024-25."
+    result = build_knowledge_graph(_document(_PARAGRAPHS + [added]), previous_source=previous["source"])
+
+    assert fake_llm.calls == 2
+    revision = result["revision"]
+    assert revision["blocks_reused"] == 1
+    assert revision["paragraphs_extracted"] == 1
+    assert revision["facts_retracted"] == 0
+    assert ("Gamma Gas", "HAS_MEASUREMENT", 300) in _facts(result)
+    assert len(result["kg"]["facts"]) == 4
+
+
+def test_reordered_paragraphs_are_reused(fake_llm, previous):
+    result = build_knowledge_graph(_document(list(reversed(_PARAGRAPHS))), previous_source=previous["source"])
+
+    assert fake_llm.calls == 0
+    assert result["revision"]["blocks_reused"] == 1
+    assert result["revision"]["facts_retracted"] == 0
+    assert _facts(result) == _facts(previous)
+
+
+def test_untagged_block_is_reused_or_retracted_whole(fake_llm):
+    fake_llm.tagged = False
+    previous = build_knowledge_graph(_document(_PARAGRAPHS))
+    block = previous["source"]["blocks"][0]
+    assert not any("paragraph" in fact for fact in block["kg"]["facts"])
+    # Without tags, every fact is attributed to every paragraph of its block.
+    assert previous["source"]["provenance"]["facts"] == [block["paragraphs"]] * 3
+
+    fake_llm.calls = 0
+    unchanged = build_knowledge_graph(_document(_PARAGRAPHS), previous_source=previous["source"])
+    assert fake_llm.calls == 0
+    assert unchanged["revision"]["blocks_reused"] == 1
+
+    removed = build_knowledge_graph(_document(_PARAGRAPHS[:2]), previous_source=previous["source"])
+    revision = removed["revision"]
+    assert fake_llm.calls == 2
+    assert revision["blocks_trimmed"] == 0
+    assert revision["blocks_retracted"] == 1
+    assert revision["paragraphs_extracted"] == 2
+    assert revision["facts_retracted"] == 3
+    assert revision["measurements_retracted"] == 2
+    assert _facts(removed) == {("Acme Ltd", "HAS_MEASUREMENT", 100), ("Beta Power", "HAS_MEASUREMENT", 200)}
+
+
+def test_entities_merge_across_blocks_by_name_and_type(fake_llm, monkeypatch):
+    # One paragraph per block.
+    monkeypatch.setattr(settings, "revision_block_chars", 60)
+    result = build_knowledge_graph(_document(_PARAGRAPHS))
+
+    assert result["revision"]["blocks_extracted"] == 3
+    assert sorted(e["name"] for e in result["kg"]["entities"].values()) == ["Acme Ltd", "Beta Power"]
+    assert len(result["kg"]["facts"]) == 3
+    assert _facts(result) == {
+        ("Acme Ltd", "HAS_MEASUREMENT", 100),
+        ("Beta Power", "HAS_MEASUREMENT", 200),
+        ("Acme Ltd", "OWNS", "Beta Power"),
+    }
+
+
+def test_merge_keeps_entities_of_different_types_apart():
+    def block(pid, entity_type):
+        return {
+            "paragraphs": [pid],
+            "kg": {
+                "entities": {"E1": {"name": "Acme", "type": entity_type, "properties": {}},
+                             "E2": {"name": "acme ", "type": "COMPANY", "properties": {"country": "India"}}},
+                "measurements": {},
+                "facts": [{"subject": "E1", "predicate": "OWNS", "object": "E2", "paragraph": pid}],
+            },
+            "triples": "",
+        }
+
+    kg, provenance = merge_blocks([block("p1", "COMPANY"), block("p2", "SEGMENT")])
+
+    assert [(e["name"], e["type"]) for e in kg["entities"].values()] == [
+        ("Acme", "COMPANY"), ("Acme", "SEGMENT")
+    ]
+    assert kg["entities"]["E1"]["properties"] == {"country": "India"}
+    assert kg["facts"] == [
+        {"subject": "E1", "predicate": "OWNS", "object": "E1"},
+        {"subject": "E2", "predicate": "OWNS", "object": "E1"},
+    ]
+    assert provenance["facts"] == [["p1"], ["p2"]]
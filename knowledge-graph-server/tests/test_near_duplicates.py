@@ -0,0 +1,67 @@
+import pytest
+
+from app.api.routes.kg import _ingest
+from app.core.config import settings
+from app.services import near_duplicates
+from app.services.near_duplicates import check_near_duplicate, get_near_duplicate_stats, register_document
+
+_TEXT = "\n\n".join(
+    f"Segment {i} reported revenue of {100 + i} crore rupees for FY 2024-25, up {i} percent from the previous year."
+    for i in range(1, 21)
+)
+
+
+@pytest.fixture(autouse=True)
+def _empty_index(storage):
+    pass
+
+
+def test_exact_resubmission_is_an_exact_match_not_a_near_duplicate():
+    first = check_near_duplicate(_TEXT)
+    register_document(first)
+    flagged = get_near_duplicate_stats()["flagged"]
+
+    again = check_near_duplicate(_TEXT)
+    assert again["stored"]
+    assert again["duplicate_of"] == {"doc_id": first["doc_id"], "similarity": 1.0, "exact": True}
+    assert get_near_duplicate_stats()["flagged"] == flagged
+
+    register_document(again)
+    assert len(near_duplicates.get_index()) == 1
+
+
+def test_edited_resubmission_links_to_the_original():
+    first = check_near_duplicate(_TEXT)
+    register_document(first)
+
+    edited = check_near_duplicate(_TEXT.replace("Segment 7 ", "Division 7 "))
+    assert not edited["stored"]
+    assert edited["duplicate_of"]["doc_id"] == first["doc_id"]
+    assert not edited["duplicate_of"]["exact"]
+    assert edited["duplicate_of"]["similarity"] < 1.0
+
+
+@pytest.mark.parametrize("mode", ["skip", "delta"])
+def test_exact_resubmission_is_rebuilt_without_llm_calls(fake_llm, monkeypatch, mode):
+    monkeypatch.setattr(settings, "near_duplicate_mode", mode)
+    first = _ingest(_TEXT)
+    calls = fake_llm.calls
+    assert calls == 2
+
+    again = _ingest(_TEXT)
+    assert again["near_duplicate"]["action"] == "exact"
+    assert fake_llm.calls == calls
+    assert again["kg"] == first["kg"]
+    assert again["factual_triples"] == first["factual_triples"]
+
+
+def test_exact_resubmission_is_processed_as_usual_in_flag_mode(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "near_duplicate_mode", "flag")
+    _ingest(_TEXT)
+    calls = fake_llm.calls
+    assert calls == 2
+
+    again = _ingest(_TEXT)
+    assert again["near_duplicate"]["action"] == "flagged"
+    assert again["near_duplicate"]["duplicate_of"]["exact"]
+    assert fake_llm.calls == 2 * calls